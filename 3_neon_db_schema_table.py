@@ -4,6 +4,8 @@ from dotenv import load_dotenv
 from sqlalchemy import create_engine, text
 import pandas as pd
 from urllib.parse import quote_plus
+from governor import governor, show_queue_position
+from table_preview import show_table_preview
 
 # Load environment variables
 load_dotenv()
@@ -34,6 +36,9 @@ if "selected_schema" not in st.session_state:
 
 st.title("🧠 Database Schema Explorer")
 
+# Identify this session to the shared rate limiter and show its queue position
+show_queue_position(st)
+
 # 1️⃣ Select Schema
 selected_schema = st.selectbox("Step 1: Choose a schema", valid_schemas)
 
@@ -44,7 +49,7 @@ if st.button("🔍 Fetch Tables"):
         WHERE table_schema = '{selected_schema}';
     """
     try:
-        with engine.connect() as connection:
+        with governor.db_connection(engine) as connection:
             result = connection.execute(text(query))
             df = pd.DataFrame(result.fetchall(), columns=["table_name"])
         if not df.empty:
@@ -69,7 +74,7 @@ if st.session_state.tables and st.session_state.selected_schema:
               AND table_name = '{selected_table}';
         """
         try:
-            with engine.connect() as connection:
+            with governor.db_connection(engine) as connection:
                 result = connection.execute(text(query_columns))
                 cols_df = pd.DataFrame(result.fetchall(), columns=["Column Name", "Data Type"])
             if not cols_df.empty:
@@ -79,3 +84,6 @@ if st.session_state.tables and st.session_state.selected_schema:
                 st.warning("No columns found.")
         except Exception as e:
             st.error(f"Error fetching columns: {e}")
+
+    # 3️⃣ Preview table data
+    show_table_preview(engine, st.session_state.selected_schema, selected_table)
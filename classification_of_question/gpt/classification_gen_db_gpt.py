@@ -1,9 +1,16 @@
+import sys
+from pathlib import Path
 from langchain.prompts import PromptTemplate
 from langchain.output_parsers import StructuredOutputParser, ResponseSchema
-from langchain_openai import ChatOpenAI
 from langchain_core.runnables import RunnableMap
 import streamlit as st
 
+# Shared helpers live in the repository root
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from model_router import router, require_choice
+import hedging
+from governor import show_queue_position
+
 # Define response schema
 response_schemas = [
     ResponseSchema(name="type", description="The type of question, either 'general' or 'database'")
@@ -25,16 +32,20 @@ Return the result in this format:
     partial_variables={"format_instructions": output_parser.get_format_instructions()}
 )
 
-# Define the LLM
-llm = ChatOpenAI(model="gpt-4o", temperature=0)
-
-# Create the classification chain
-classification_chain = classification_prompt | llm | output_parser
+# Create the classification chain, routed to the cheapest model that returns a valid label
+classification_chain = router.chain(
+    "classification",
+    lambda llm: classification_prompt | llm | output_parser,
+    validate=require_choice("type", {"general", "database"}),
+)
 
 # Streamlit UI
 st.set_page_config(page_title="Question Classifier", layout="centered")
 st.title("🧠 Strique Question Classifier")
 
+# Identify this session to the shared rate limiter and show its queue position
+show_queue_position(st)
+
 # Input from user
 user_input = st.text_input("Enter your question to classify:")
 
@@ -49,3 +60,12 @@ if st.button("Classify"):
                 st.success(f"This is a **{q_type.upper()}** question.")
             except Exception as e:
                 st.error(f"Error: {e}")
+
+# Routing stats (latency, cost and escalation rate per model)
+with st.sidebar.expander("Model routing stats"):
+    st.dataframe(router.stats())
+
+# Hedging stats (duplicate request rate and tail-latency savings), when enabled
+if router.hedge:
+    with st.sidebar.expander("Request hedging stats"):
+        st.dataframe(hedging.report())
@@ -1,8 +1,14 @@
+import sys
+from pathlib import Path
 from langchain.prompts import PromptTemplate
 from langchain.output_parsers import StructuredOutputParser, ResponseSchema
-from langchain_openai import ChatOpenAI
 from langchain_core.runnables import RunnableMap
 
+# Shared helpers live in the repository root
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from model_router import ModelRouter, require_choice
+from llm_cassette import cassette_model_factory
+
 response_schemas = [
     ResponseSchema(name="type", description="The type of question, either 'general' or 'database'")
 ]
@@ -21,6 +27,15 @@ Return the result in this format:
     partial_variables={"format_instructions": output_parser.get_format_instructions()}
 )
 
-llm = ChatOpenAI(model="gpt-3.5-turbo", temperature=0)
+# Replays recorded responses by default so the tests run offline;
+# set LLM_CASSETTE_MODE=record (with OPENAI_API_KEY) to refresh them.
+# Entries marked "synthetic" were written by hand, not recorded, and
+# test_chain.py skips replaying them.
+CASSETTE_PATH = Path(__file__).parent / "cassettes" / "classify_chain.json"
+router = ModelRouter(model_factory=cassette_model_factory(CASSETTE_PATH))
 
-classification_chain = classification_prompt | llm | output_parser
+classification_chain = router.chain(
+    "classification",
+    lambda llm: classification_prompt | llm | output_parser,
+    validate=require_choice("type", {"general", "database"}),
+)
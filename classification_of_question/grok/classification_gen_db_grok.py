@@ -1,11 +1,18 @@
 import streamlit as st
-from langchain_openai import ChatOpenAI
 from langchain_core.prompts import PromptTemplate, load_prompt
 from langchain_core.output_parsers import StrOutputParser, JsonOutputParser
 from langchain_core.runnables import RunnablePassthrough
 from dotenv import load_dotenv
 import os
+import sys
 import json
+from pathlib import Path
+
+# Shared helpers live in the repository root
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from model_router import router, require_choice
+import hedging
+from governor import show_queue_position
 
 # Load environment variables
 load_dotenv()
@@ -23,6 +30,9 @@ with st.sidebar:
 
 # Main content area
 st.title("🤖 Strique GPT V1")
+
+# Identify this session to the shared rate limiter and show its queue position
+show_queue_position(st)
 st.markdown("Enter a question, and I'll classify it as a database-related question or a general question.")
 
 # Check for OpenAI API key
@@ -30,13 +40,6 @@ if not os.getenv("OPENAI_API_KEY"):
     st.error("Error: OPENAI_API_KEY not found. Please set it in your .env file.")
     st.stop()
 
-# Initialize the model
-try:
-    model = ChatOpenAI(model="gpt-4o", temperature=0.0)
-except Exception as e:
-    st.error(f"Error initializing model: {str(e)}")
-    st.stop()
-
 # Load prompt template
 try:
     template = load_prompt("template.json")
@@ -52,12 +55,17 @@ def create_classification_chain():
     # Use JsonOutputParser to parse the LLM's output
     parser = JsonOutputParser()
 
-    # Create the chain: Prompt -> LLM -> Parser
-    chain = (
-        {"input": RunnablePassthrough()}  # Pass the input directly
-        | template
-        | model
-        | parser
+    # Create the chain: Prompt -> LLM -> Parser, routed to the cheapest model
+    # and escalated when the JSON does not parse or the label is unknown
+    chain = router.chain(
+        "classification",
+        lambda model: (
+            {"input": RunnablePassthrough()}  # Pass the input directly
+            | template
+            | model
+            | parser
+        ),
+        validate=require_choice("type", {"general", "database"}),
     )
     return chain
 
@@ -117,4 +125,13 @@ if submit_button and not user_input.strip():
 # Clear chat history button
 if st.button("Clear Chat History"):
     st.session_state.messages = []
-    st.rerun()
\ No newline at end of file
+    st.rerun()
+
+# Routing stats (latency, cost and escalation rate per model)
+with st.sidebar.expander("Model routing stats"):
+    st.dataframe(router.stats())
+
+# Hedging stats (duplicate request rate and tail-latency savings), when enabled
+if router.hedge:
+    with st.sidebar.expander("Request hedging stats"):
+        st.dataframe(hedging.report())
@@ -1,9 +1,15 @@
 import streamlit as st
 import os
+import sys
 from dotenv import load_dotenv
 from sqlalchemy import create_engine, text
 import pandas as pd
 from urllib.parse import quote_plus
+from pathlib import Path
+
+# Shared helpers live in the repository root
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from governor import governor, show_queue_position
 
 # Load environment variables
 load_dotenv()
@@ -27,6 +33,10 @@ valid_schemas = [
 
 # Streamlit UI
 st.title("🔍 Select a Schema")
+
+# Identify this session to the shared rate limiter and show its queue position
+show_queue_position(st)
+
 selected_schema = st.selectbox("Choose a schema:", valid_schemas)
 
 if st.button("Fetch Tables"):
@@ -38,7 +48,7 @@ if st.button("Fetch Tables"):
     """
 
     try:
-        with engine.connect() as connection:
+        with governor.db_connection(engine) as connection:
             result = connection.execute(text(query))
             df = pd.DataFrame(result.fetchall(), columns=["table_name"])
         
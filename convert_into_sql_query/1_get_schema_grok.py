@@ -1,9 +1,15 @@
 import streamlit as st
 from dotenv import load_dotenv
 import os
+import sys
 from sqlalchemy import create_engine, text
 import pandas as pd
 from urllib.parse import quote_plus
+from pathlib import Path
+
+# Shared helpers live in the repository root
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from governor import governor, show_queue_position
 
 # Load environment variables
 load_dotenv()
@@ -23,6 +29,9 @@ with st.sidebar:
 st.title("🤖 Strique GPT V1")
 st.markdown("Select a schema to view its tables, or enter a question to generate an SQL query.")
 
+# Identify this session to the shared rate limiter and show its queue position
+show_queue_position(st)
+
 # Function to fetch schema details
 def fetch_schema_details(schema_name):
     try:
@@ -52,7 +61,7 @@ def fetch_schema_details(schema_name):
         """
 
         # Run query and fetch results
-        with engine.connect() as connection:
+        with governor.db_connection(engine) as connection:
             result = connection.execute(text(query), {"schema_name": schema_name})
             tables = result.fetchall()
 
@@ -1,9 +1,15 @@
 import streamlit as st
 from dotenv import load_dotenv
 import os
+import sys
 from sqlalchemy import create_engine, text
 import pandas as pd
 from urllib.parse import quote_plus
+from pathlib import Path
+
+# Shared helpers live in the repository root
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from governor import governor, show_queue_position
 
 # Load environment variables
 load_dotenv()
@@ -27,6 +33,9 @@ with st.sidebar:
 st.title("🤖 Strique GPT V1")
 st.markdown("Select a schema to view its tables, then select a table to view its columns.")
 
+# Identify this session to the shared rate limiter and show its queue position
+show_queue_position(st)
+
 # Function to fetch schema details
 def fetch_schema_details(schema_name):
     try:
@@ -56,7 +65,7 @@ def fetch_schema_details(schema_name):
         """
 
         # Run query and fetch results
-        with engine.connect() as connection:
+        with governor.db_connection(engine) as connection:
             result = connection.execute(text(query), {"schema_name": schema_name})
             tables = result.fetchall()
 
@@ -99,7 +108,7 @@ def fetch_column_names(schema_name, table_name):
         """
 
         # Run query and fetch results
-        with engine.connect() as connection:
+        with governor.db_connection(engine) as connection:
             result = connection.execute(text(query), {"schema_name": schema_name, "table_name": table_name})
             columns = result.fetchall()
 
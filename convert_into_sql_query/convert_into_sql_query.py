@@ -1,36 +1,27 @@
 import os
+import sys
+import logging
+from pathlib import Path
 from dotenv import load_dotenv
 from urllib.parse import quote_plus
 from sqlalchemy import text
+from sqlalchemy.exc import DataError, ProgrammingError
 from langchain_community.utilities import SQLDatabase
-from langchain_openai import ChatOpenAI
 from langchain.prompts import PromptTemplate
-from langchain.chains import create_sql_query_chain
+import pandas as pd
+
+# Shared helpers live in the repository root
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from model_router import ModelRouter
+from governor import governor
+from llm_cassette import cassette_model_factory
+from prompt_assembler import SchemaPromptAssembler, create_budgeted_sql_query_chain
+from result_cache import ResultCache
+import hedging
 
 # Load environment variables
 load_dotenv()
 
-# DB credentials from .env
-user = os.getenv("POSTGRES_USER")
-password = quote_plus(os.getenv("POSTGRES_PASSWORD"))
-host = os.getenv("POSTGRES_HOST")
-port = os.getenv("POSTGRES_PORT")
-dbname = os.getenv("POSTGRES_DB")
-openai_api_key = os.getenv("OPENAI_API_KEY")
-
-# Build connection string with multi-schema access
-db_uri = f"postgresql://{user}:{password}@{host}:{port}/{dbname}?options=-csearch_path=amazon_ads,meta,shopify,tiktok"
-
-# Connect to DB with exposed tables
-db = SQLDatabase.from_uri(
-    db_uri,
-    include_tables=["ads", "meta_ads", "order", "tiktok_ads"],
-    sample_rows_in_table_info=2
-)
-
-# Initialize OpenAI model
-llm = ChatOpenAI(model="gpt-4-0125-preview", api_key=openai_api_key)
-
 # LangChain enforces these exact input vars: input, top_k, table_info
 sql_prompt = PromptTemplate.from_template("""
 You are a PostgreSQL SQL expert. Generate only a syntactically correct SQL query (no markdown, no explanations).
@@ -44,26 +35,101 @@ Return only the SQL query.
 """)
 sql_prompt.input_variables = ["input", "top_k", "table_info"]
 
-# Build the SQL generation chain
-sql_chain = create_sql_query_chain(llm=llm, db=db, prompt=sql_prompt)
-
-# User's natural language question
-user_input = {
-    "input": "Show me top 5 campaigns with highest clicks from amazon ads.",
-    "top_k": 5
-}
-
-# Generate SQL
-sql_query = sql_chain.invoke(user_input)
-print("🧠 Generated SQL:\n", sql_query)
-
-# Execute the SQL and print the results
-try:
-    with db._engine.connect() as connection:
-        result = connection.execute(text(sql_query))
-        rows = result.fetchall()
-        print("\n📊 Query Results:")
-        for row in rows:
-            print(dict(row))
-except Exception as e:
-    print("❌ Error executing SQL:", str(e))
+# Connect to DB with exposed tables (db_uri defaults to the .env credentials)
+def connect_db(db_uri=None):
+    if db_uri is None:
+        # DB credentials from .env
+        user = os.getenv("POSTGRES_USER")
+        password = quote_plus(os.getenv("POSTGRES_PASSWORD"))
+        host = os.getenv("POSTGRES_HOST")
+        port = os.getenv("POSTGRES_PORT")
+        dbname = os.getenv("POSTGRES_DB")
+
+        # Build connection string with multi-schema access
+        db_uri = f"postgresql://{user}:{password}@{host}:{port}/{dbname}?options=-csearch_path=amazon_ads,meta,shopify,tiktok"
+
+    return SQLDatabase.from_uri(
+        db_uri,
+        include_tables=["ads", "meta_ads", "order", "tiktok_ads"],
+        sample_rows_in_table_info=2
+    )
+
+# Model router for SQL generation; set LLM_CASSETTE_MODE=record or replay to
+# capture or serve responses from cassettes/sql_chain.json instead of calling OpenAI
+def create_router():
+    return ModelRouter(
+        model_factory=cassette_model_factory(Path(__file__).parent / "cassettes" / "sql_chain.json", default_mode="off")
+    )
+
+# Reject SQL the database cannot plan so the router escalates to a stronger model.
+# Connection problems (OperationalError, InterfaceError) are not the model's fault,
+# so they propagate instead of escalating.
+def validate_sql(engine, sql_query):
+    try:
+        with governor.db_connection(engine) as connection:
+            connection.execute(text(f"EXPLAIN {sql_query}"))
+    except (ProgrammingError, DataError) as e:
+        raise ValueError(f"Generated SQL does not compile: {e}") from e
+
+# Build the SQL generation chain, routed from the cheapest SQL model upwards
+def build_sql_chain(db, router):
+    # Fit the schema context into SQL_PROMPT_TOKEN_BUDGET tokens (default 2000)
+    assembler = SchemaPromptAssembler(db)
+
+    return router.chain(
+        "sql",
+        lambda llm: create_budgeted_sql_query_chain(llm, assembler, sql_prompt),
+        validate=lambda sql_query: validate_sql(db._engine, sql_query),
+    )
+
+# Answer a question, from the session's cached results when it is a provable
+# refinement of one (filter, sort, top-N, projection), otherwise from the database
+def ask(question, sql_chain, db, cache):
+    local = cache.answer(question)
+    if local is not None:
+        frame, steps = local
+        print("♻️ Answered from cached results:", "; ".join(steps))
+        return frame
+
+    sql_query = sql_chain.invoke({"question": question})
+    print("🧠 Generated SQL:\n", sql_query)
+    with governor.db_connection(db._engine) as connection:
+        frame = pd.read_sql(text(sql_query), connection)
+    cache.add(question, sql_query, frame)
+    return frame
+
+
+if __name__ == "__main__":
+    # Log the token count of every SQL prompt
+    logging.basicConfig(format="%(message)s")
+    logging.getLogger("prompt_assembler").setLevel(logging.INFO)
+
+    db = connect_db()
+    router = create_router()
+    sql_chain = build_sql_chain(db, router)
+
+    # Last few result frames of this session, for follow-up refinements
+    cache = ResultCache()
+
+    # User's natural language question, then follow-ups until a blank line
+    question = "Show me top 5 campaigns with highest clicks from amazon ads."
+    while question:
+        # Generate SQL (or reuse cached results) and print the results
+        try:
+            frame = ask(question, sql_chain, db, cache)
+            print("\n📊 Query Results:")
+            print(frame.to_string(index=False))
+        except Exception as e:
+            print("❌ Error executing SQL:", str(e))
+        question = input("\n💬 Follow-up question (blank to finish): ").strip()
+
+    # Routing stats (latency, cost and escalation rate per model)
+    print("\n📈 Model routing stats:")
+    for route in router.stats():
+        print(route)
+
+    # Hedging stats (duplicate request rate and tail-latency savings), when enabled
+    if router.hedge:
+        print("\n⏱️ Request hedging stats:")
+        for model in hedging.report():
+            print(model)
@@ -0,0 +1,61 @@
+-- Small stand-in for the Neon tables exposed to the SQL chain, used by evaluate_sql_chain.py
+CREATE TABLE ads (
+    campaign_id INTEGER PRIMARY KEY,
+    campaign_name TEXT NOT NULL,
+    date DATE NOT NULL,
+    impressions INTEGER,
+    clicks INTEGER,
+    cost NUMERIC(12, 2)
+);
+
+CREATE TABLE meta_ads (
+    ad_id INTEGER PRIMARY KEY,
+    campaign_name TEXT NOT NULL,
+    date DATE NOT NULL,
+    impressions INTEGER,
+    clicks INTEGER,
+    spend NUMERIC(12, 2)
+);
+
+CREATE TABLE "order" (
+    id INTEGER PRIMARY KEY,
+    created_at TIMESTAMP NOT NULL,
+    customer_email TEXT,
+    shipping_city TEXT,
+    total_price NUMERIC(12, 2)
+);
+
+CREATE TABLE tiktok_ads (
+    ad_id INTEGER PRIMARY KEY,
+    campaign_name TEXT NOT NULL,
+    date DATE NOT NULL,
+    impressions INTEGER,
+    clicks INTEGER,
+    spend NUMERIC(12, 2)
+);
+
+INSERT INTO ads VALUES
+    (1, 'Brand Search', '2024-05-01', 12000, 640, 310.50),
+    (2, 'Spring Sale', '2024-05-01', 30000, 1210, 720.00),
+    (3, 'Competitor KW', '2024-05-02', 8000, 150, 95.25),
+    (4, 'Retargeting', '2024-05-02', 15000, 880, 402.10),
+    (5, 'New Arrivals', '2024-05-03', 22000, 990, 515.75),
+    (6, 'Clearance', '2024-05-03', 5000, 75, 40.00),
+    (7, 'Video Launch', '2024-05-04', 40000, 1500, 1100.00);
+
+INSERT INTO meta_ads VALUES
+    (1, 'Lookalike US', '2024-05-01', 50000, 900, 450.00),
+    (2, 'Story Carousel', '2024-05-02', 32000, 610, 300.00),
+    (3, 'Retargeting', '2024-05-03', 18000, 720, 260.00);
+
+INSERT INTO "order" VALUES
+    (1, '2024-05-01 10:15:00', 'asha@example.com', 'Pune', 1499.00),
+    (2, '2024-05-01 12:40:00', 'ravi@example.com', 'Mumbai', 899.00),
+    (3, '2024-05-02 09:05:00', 'asha@example.com', 'Pune', 2499.00),
+    (4, '2024-05-03 18:30:00', 'meera@example.com', 'Delhi', 499.00),
+    (5, '2024-05-04 20:10:00', 'john@example.com', 'Mumbai', 3299.00);
+
+INSERT INTO tiktok_ads VALUES
+    (1, 'Creator Collab', '2024-05-01', 70000, 2100, 820.00),
+    (2, 'Hashtag Challenge', '2024-05-02', 90000, 1800, 950.00),
+    (3, 'Spark Ads', '2024-05-03', 25000, 400, 210.00);
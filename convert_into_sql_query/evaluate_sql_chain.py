@@ -0,0 +1,199 @@
+# Execution-match evaluation of the text-to-SQL chain: generate SQL for every gold
+# question concurrently, run generated and reference SQL against a fixture database
+# through a shared connection pool, and report accuracy, latency and tokens.
+#
+#   python evaluate_sql_chain.py [--gold eval/gold.jsonl] [--db-url URL] [--workers 4] [--output run.json]
+#
+# --db-url (or EVAL_DB_URL) must point at a scratch PostgreSQL database: the SQL prompt
+# asks for PostgreSQL and generated SQL is validated with EXPLAIN, so another dialect
+# would fail valid answers and skew the routing stats. eval/fixture.sql is loaded into
+# a throwaway schema there and dropped afterwards. Set LLM_CASSETTE_MODE=replay to
+# score recorded responses offline.
+import os
+import re
+import json
+import time
+import uuid
+import argparse
+from pathlib import Path
+from collections import Counter
+from datetime import date, datetime
+from decimal import Decimal
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, text, make_url
+from langchain_community.callbacks.openai_info import OpenAICallbackHandler
+
+from convert_into_sql_query import connect_db, create_router, build_sql_chain
+
+EVAL_DIR = Path(__file__).parent / "eval"
+
+
+def with_search_path(url, schema):
+    """url with schema first on the search_path, keeping any libpq options already there
+    (Neon URLs carry options=endpoint=...)."""
+    options = url.query.get("options", "")
+    if isinstance(options, tuple):
+        options = " ".join(options)
+    return url.update_query_dict({"options": f"{options} -csearch_path={schema}".strip()})
+
+
+def load_fixture(db_url, fixture_sql=EVAL_DIR / "fixture.sql"):
+    """Load the fixture tables and return (url that sees them, schema to drop afterwards).
+
+    On PostgreSQL the tables go into a fresh schema put first on the search_path;
+    other databases (SQLite in the tests) get them directly and no schema.
+    """
+    url = make_url(db_url)
+    schema = None
+    if url.get_backend_name() == "postgresql":
+        schema = f"sql_eval_{uuid.uuid4().hex[:8]}"
+        url = with_search_path(url, schema)
+    statements = [statement.strip() for statement in Path(fixture_sql).read_text().split(";") if statement.strip()]
+
+    engine = create_engine(url)
+    with engine.begin() as connection:
+        if schema:
+            connection.exec_driver_sql(f'CREATE SCHEMA "{schema}"')
+        for statement in statements:
+            connection.exec_driver_sql(statement)
+    engine.dispose()
+    return url.render_as_string(hide_password=False), schema
+
+
+def drop_fixture(db_url, schema):
+    if schema is None:
+        return
+    engine = create_engine(db_url)
+    with engine.begin() as connection:
+        connection.exec_driver_sql(f'DROP SCHEMA "{schema}" CASCADE')
+    engine.dispose()
+
+
+def load_gold(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def normalize_value(value):
+    if isinstance(value, (Decimal, float)):
+        return round(float(value), 4)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def results_match(generated_rows, reference_rows, ordered=False):
+    """Compare result sets by value, ignoring column names; row order only matters when ordered."""
+    generated = [tuple(normalize_value(value) for value in row) for row in generated_rows]
+    reference = [tuple(normalize_value(value) for value in row) for row in reference_rows]
+    if ordered:
+        return generated == reference
+    return Counter(generated) == Counter(reference)
+
+
+def generate(chain, item):
+    usage = OpenAICallbackHandler()
+    start = time.perf_counter()
+    try:
+        sql, error = chain.invoke({"question": item["question"]}, config={"callbacks": [usage]}), None
+    except Exception as e:
+        sql, error = None, f"generation failed: {e}"
+    return {
+        "question": item["question"],
+        "reference_sql": item["sql"],
+        "generated_sql": sql,
+        "latency_s": round(time.perf_counter() - start, 3),
+        "tokens": usage.total_tokens,
+        "cost_usd": usage.total_cost,
+        "error": error,
+    }
+
+
+def score(engine, result):
+    def execute(sql):
+        with engine.connect() as connection:
+            return connection.execute(text(sql)).fetchall()
+
+    result = {**result, "match": False}
+    if result["error"]:
+        return result
+    try:
+        reference_rows = execute(result["reference_sql"])
+    except Exception as e:
+        result["error"] = f"reference SQL failed: {e}"
+        return result
+    try:
+        generated_rows = execute(result["generated_sql"])
+    except Exception as e:
+        result["error"] = f"generated SQL failed: {e}"
+        return result
+    ordered = re.search(r"\border\s+by\b", result["reference_sql"], re.IGNORECASE) is not None
+    result["match"] = results_match(generated_rows, reference_rows, ordered)
+    return result
+
+
+def run_evaluation(chain, engine, gold, workers=4):
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        generated = list(pool.map(lambda item: generate(chain, item), gold))
+        return list(pool.map(lambda result: score(engine, result), generated))
+
+
+def summarize(results):
+    latencies = pd.Series([result["latency_s"] for result in results])
+    return {
+        "questions": len(results),
+        "accuracy": sum(result["match"] for result in results) / len(results) if results else 0.0,
+        "errors": sum(result["error"] is not None for result in results),
+        "latency_mean_s": round(latencies.mean(), 3),
+        "latency_p50_s": round(latencies.quantile(0.5), 3),
+        "latency_p95_s": round(latencies.quantile(0.95), 3),
+        "total_tokens": sum(result["tokens"] for result in results),
+        "total_cost_usd": round(sum(result["cost_usd"] for result in results), 6),
+    }
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Execution-match evaluation of the text-to-SQL chain")
+    parser.add_argument("--gold", default=EVAL_DIR / "gold.jsonl", help="JSONL file of {question, sql} pairs")
+    parser.add_argument("--db-url", default=os.getenv("EVAL_DB_URL"), help="scratch PostgreSQL database to load eval/fixture.sql into")
+    parser.add_argument("--workers", type=int, default=4, help="concurrent generations and DB connections")
+    parser.add_argument("--output", help="write the per-question results and summary to this JSON file")
+    args = parser.parse_args()
+
+    db_url = args.db_url
+    if not db_url:
+        parser.error("set --db-url or EVAL_DB_URL to a scratch PostgreSQL database")
+    if make_url(db_url).get_backend_name() != "postgresql":
+        parser.error("the SQL prompt and EXPLAIN validation are PostgreSQL-specific, so --db-url must be a PostgreSQL database")
+
+    fixture_url, schema = load_fixture(db_url)
+    try:
+        db = connect_db(fixture_url)
+        router = create_router()
+        chain = build_sql_chain(db, router)
+        engine = create_engine(fixture_url, pool_size=args.workers, max_overflow=0)
+
+        results = run_evaluation(chain, engine, load_gold(args.gold), workers=args.workers)
+        summary = summarize(results)
+    finally:
+        drop_fixture(db_url, schema)
+
+    print("🧪 Per-question results:")
+    print(pd.DataFrame(results)[["question", "match", "latency_s", "tokens", "error"]].to_string(index=False))
+    print("\n📊 Summary:")
+    for key, value in summary.items():
+        print(f"{key}: {value}")
+    print("\n📈 Model routing stats:")
+    for route in router.stats():
+        print(route)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps({"summary": summary, "results": results}, indent=2, default=str))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+import os
+import re
+import logging
+
+import tiktoken
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.runnables import RunnableLambda, RunnablePassthrough
+
+logger = logging.getLogger(__name__)
+
+# Short spellings for verbose SQL types, applied once sample rows are gone and the schema still does not fit
+TYPE_ABBREVIATIONS = [
+    (r"^(CHARACTER VARYING|VARCHAR|CHAR|CHARACTER|TEXT)(\(\d+\))?$", "text"),
+    (r"^TIMESTAMP( WITHOUT TIME ZONE| WITH TIME ZONE)?(\(\d+\))?$", "ts"),
+    (r"^(DOUBLE PRECISION|REAL|FLOAT)(\(\d+\))?$", "float"),
+    (r"^(NUMERIC|DECIMAL)(\(\d+(, ?\d+)?\))?$", "num"),
+    (r"^(BIGINT|INTEGER|SMALLINT)$", "int"),
+    (r"^BOOLEAN$", "bool"),
+    (r"^JSONB?$", "json"),
+]
+
+
+def abbreviate_type(type_name):
+    for pattern, short in TYPE_ABBREVIATIONS:
+        if re.match(pattern, type_name, re.IGNORECASE):
+            return short
+    return type_name.lower()
+
+
+def tiktoken_counter(model="gpt-4o-mini"):
+    """Exact token counts with the model's local tokenizer."""
+    try:
+        encoding = tiktoken.encoding_for_model(model)
+    except KeyError:
+        encoding = tiktoken.get_encoding("cl100k_base")
+    return lambda text: len(encoding.encode(text))
+
+
+def _words(text):
+    # Lowercased words with a naive plural strip, so "clicks" matches "click"
+    return {word.rstrip("s") for word in re.findall(r"[a-z0-9]+", text.lower()) if len(word) > 1}
+
+
+class SchemaPromptAssembler:
+    """Render {table_info} for the SQL prompt within a token budget.
+
+    Starts from the CREATE TABLE statements SQLDatabase.get_table_info would give (quoted
+    names, primary and foreign keys, sample rows) and degrades until the schema fits: first drop the sample rows, then abbreviate
+    column types, then drop the columns least related to the question. Primary and
+    foreign key columns and the min_columns most relevant columns of each table are kept.
+    """
+
+    def __init__(self, db, budget_tokens=None, model="gpt-4o-mini", count_tokens=None, min_columns=3):
+        self.db = db
+        self.budget_tokens = budget_tokens or int(os.getenv("SQL_PROMPT_TOKEN_BUDGET", 2000))
+        self.count_tokens = count_tokens or tiktoken_counter(model)
+        self.min_columns = min_columns
+        self._sample_rows = {}
+
+    def _tables(self, table_names=None):
+        names = set(table_names or self.db.get_usable_table_names())
+        return [table for table in self.db._metadata.sorted_tables if table.name in names]
+
+    def _sample(self, table):
+        # Sample rows do not depend on the question, so query them once per table
+        if table.name not in self._sample_rows:
+            self._sample_rows[table.name] = self.db._get_sample_rows(table) if self.db._sample_rows_in_table_info else ""
+        return self._sample_rows[table.name]
+
+    def _column_type(self, column, abbreviate):
+        try:
+            type_name = str(column.type.compile(dialect=self.db._engine.dialect))
+        except Exception:
+            type_name = str(column.type)
+        return abbreviate_type(type_name) if abbreviate else type_name
+
+    def _render(self, table, columns, samples, abbreviate):
+        # Quote reserved or mixed-case names (such as "order") so the model copies valid identifiers
+        quote = self.db._engine.dialect.identifier_preparer.quote
+        lines = []
+        for column in columns:
+            line = f"\t{quote(column.name)} {self._column_type(column, abbreviate)}"
+            if not abbreviate and not column.nullable:
+                line += " NOT NULL"
+            lines.append(line)
+        kept = {column.name for column in columns}
+        primary_key = [quote(column.name) for column in table.primary_key.columns if column.name in kept]
+        if primary_key:
+            lines.append(f"\tPRIMARY KEY ({', '.join(primary_key)})")
+        # Foreign keys are the join hints; their columns are never dropped
+        for constraint in table.foreign_key_constraints:
+            if all(name in kept for name in constraint.column_keys):
+                lines.append(
+                    f"\tFOREIGN KEY({', '.join(quote(name) for name in constraint.column_keys)}) "
+                    f"REFERENCES {quote(constraint.referred_table.name)} "
+                    f"({', '.join(quote(element.column.name) for element in constraint.elements)})"
+                )
+        rendered = f"CREATE TABLE {quote(table.name)} (\n" + ",\n".join(lines) + "\n)"
+        if samples and self._sample(table):
+            rendered += f"\n\n/*\n{self._sample(table)}\n*/"
+        return rendered
+
+    def _relevance(self, column, question_words):
+        score = 2 * len(_words(column.name.replace("_", " ")) & question_words)
+        if column.primary_key or column.foreign_keys:
+            score += 100
+        return score
+
+    def table_info(self, question, table_names=None):
+        tables = self._tables(table_names)
+        question_words = _words(question)
+        columns = {table.name: list(table.columns) for table in tables}
+
+        def assemble(samples, abbreviate):
+            rendered = {table.name: self._render(table, columns[table.name], samples, abbreviate) for table in tables}
+            return rendered, self.count_tokens("\n\n".join(rendered.values()))
+
+        # Degradation ladder: full, without sample rows, with abbreviated types
+        for samples, abbreviate in [(True, False), (False, False), (False, True)]:
+            rendered, tokens = assemble(samples, abbreviate)
+            if tokens <= self.budget_tokens:
+                return "\n\n".join(rendered.values())
+
+        # Then drop the least relevant columns, re-counting only the table that changed
+        table_tokens = {name: self.count_tokens(text) for name, text in rendered.items()}
+        candidates = []
+        for table in tables:
+            ranked = sorted(
+                enumerate(table.columns),
+                key=lambda item: (self._relevance(item[1], question_words), -item[0]),
+                reverse=True,
+            )
+            candidates += [
+                (self._relevance(column, question_words), -position, table, column)
+                for position, column in ranked[self.min_columns:]
+                if not (column.primary_key or column.foreign_keys)
+            ]
+        candidates.sort(key=lambda item: (item[0], item[1]))
+
+        for _, _, table, column in candidates:
+            if sum(table_tokens.values()) <= self.budget_tokens:
+                break
+            columns[table.name] = [kept for kept in columns[table.name] if kept.name != column.name]
+            rendered[table.name] = self._render(table, columns[table.name], False, True)
+            table_tokens[table.name] = self.count_tokens(rendered[table.name])
+
+        if sum(table_tokens.values()) > self.budget_tokens:
+            logger.warning("Schema context is %d tokens, over the %d token budget", sum(table_tokens.values()), self.budget_tokens)
+        return "\n\n".join(rendered.values())
+
+    def log_prompt_tokens(self, prompt_value):
+        """Pass-through chain step that logs the size of the final prompt."""
+        tokens = self.count_tokens(prompt_value.to_string())
+        logger.info("SQL prompt: %d tokens (schema budget %d)", tokens, self.budget_tokens)
+        return prompt_value
+
+
+def create_budgeted_sql_query_chain(llm, assembler, prompt, k=5):
+    """Same contract as langchain's create_sql_query_chain ({"question", "table_names_to_use"} in,
+    SQL string out), but {table_info} comes from the token-budgeted assembler."""
+    prompt = prompt.partial(top_k=str(k))
+    if "dialect" in prompt.input_variables:
+        prompt = prompt.partial(dialect=assembler.db.dialect)
+    return (
+        RunnablePassthrough.assign(
+            input=lambda x: x["question"] + "\nSQLQuery: ",
+            table_info=lambda x: assembler.table_info(x["question"], x.get("table_names_to_use")),
+        )
+        | (lambda x: {key: value for key, value in x.items() if key not in ("question", "table_names_to_use")})
+        | prompt
+        | RunnableLambda(assembler.log_prompt_tokens)
+        | llm.bind(stop=["\nSQLResult:"])
+        | StrOutputParser()
+        | (lambda sql: sql.strip())
+    )
@@ -0,0 +1,238 @@
+import re
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import pandas as pd
+
+# Words a follow-up may contain besides the recognised refinements
+FILLER_WORDS = {
+    "instead", "now", "please", "and", "then", "show", "me", "the", "them", "it", "those",
+    "these", "results", "result", "rows", "can", "you", "could", "with", "of", "by", "only", "just",
+}
+
+SORT_PATTERN = re.compile(
+    r"\b(?:sort|sorted|order|ordered|rank|ranked)\s+(?:them\s+|it\s+)?by\s+(?P<column>[a-z0-9_ ]+?)"
+    r"(?:\s+(?P<direction>asc|ascending|desc|descending))?(?=\s+instead\b|\s+and\b|$)"
+)
+TOP_PATTERN = re.compile(r"\b(?:top|first)\s+(?P<n>\d+)\b")
+COMPARE_PATTERN = re.compile(
+    r"\b(?:with|where)\s+(?P<column>[a-z0-9_ ]+?)\s+(?P<op>above|over|more than|greater than|at least|below|under|less than|at most)"
+    r"\s+(?P<value>\d+(?:\.\d+)?)\b"
+)
+ONLY_PATTERN = re.compile(r"\b(?:only|just)\s+(?P<phrase>[a-z0-9_ ,\-]+?)(?=\s+instead\b|$)")
+SHOW_PATTERN = re.compile(r"\bshow\s+(?:me\s+)?(?:only\s+|just\s+)?(?:the\s+)?(?P<phrase>[a-z0-9_ ,]+?)(?:\s+columns?)?$")
+# Any row-limiting clause, in any subquery, means the frame may be missing rows
+TRUNCATION_PATTERN = re.compile(r"\b(?:limit|fetch|offset|top)\b", re.IGNORECASE)
+# A plain sort key (column, qualified column or position), matched against the outermost query only
+ORDER_PATTERN = re.compile(
+    r"\border\s+by\s+(\"[^\"]+\"|[\w.]+)(?:\s+(asc|desc))?\s*(?=,|;|$|\b(?:limit|offset|fetch|nulls)\b)",
+    re.IGNORECASE,
+)
+
+COMPARISONS = {
+    "above": "gt", "over": "gt", "more than": "gt", "greater than": "gt", "at least": "ge",
+    "below": "lt", "under": "lt", "less than": "lt", "at most": "le",
+}
+
+
+def _key(name):
+    return re.sub(r"[^a-z0-9]+", "_", str(name).lower()).strip("_")
+
+
+def _strip_literals(sql):
+    # Comments and string literals, so words and parentheses inside them are ignored
+    sql = re.sub(r"--[^\n]*|/\*.*?\*/", " ", sql, flags=re.DOTALL)
+    return re.sub(r"'(?:[^']|'')*'", "''", sql)
+
+
+def _outer_query(sql):
+    """The SQL with every parenthesised part emptied to "()", leaving only the outermost
+    query's clauses (so subquery, CTE and window ORDER BYs are gone)."""
+    outer = []
+    depth = 0
+    for char in _strip_literals(sql):
+        if char == "(":
+            depth += 1
+            if depth == 1:
+                outer.append(char)
+        elif char == ")" and depth:
+            depth -= 1
+            if depth == 0:
+                outer.append(char)
+        elif depth == 0:
+            outer.append(char)
+    return "".join(outer).strip()
+
+
+def resolve_column(frame, phrase):
+    """The single frame column a phrase like "campaign name" or "spend" refers to, or None."""
+    key = _key(phrase)
+    if not key:
+        return None
+    for matches in (
+        [column for column in frame.columns if _key(column) == key],
+        [column for column in frame.columns if _key(column).rstrip("s") == key.rstrip("s")],
+        [column for column in frame.columns if key in _key(column)],
+    ):
+        if len(matches) == 1:
+            return matches[0]
+        if matches:
+            return None
+    return None
+
+
+@dataclass
+class CachedResult:
+    question: str
+    sql: str
+    frame: pd.DataFrame
+    # False when the frame may be missing rows (the SQL limits rows anywhere, or a local top-N was applied)
+    complete: bool
+    # (column, descending) the rows are known to be ordered by, if any
+    order: Optional[Tuple[str, bool]]
+
+    @classmethod
+    def from_sql(cls, question, sql, frame):
+        complete = TRUNCATION_PATTERN.search(_strip_literals(sql)) is None
+        order = None
+        match = ORDER_PATTERN.search(_outer_query(sql))
+        if match:
+            key = match.group(1).split(".")[-1].strip('"')
+            if key.isdigit():
+                column = frame.columns[int(key) - 1] if 0 < int(key) <= len(frame.columns) else None
+            else:
+                column = resolve_column(frame, key)
+            if column is not None:
+                order = (column, (match.group(2) or "asc").lower() == "desc")
+        return cls(question, sql, frame, complete, order)
+
+
+class ResultCache:
+    """Last few result frames of a session, used to answer refinements without a new query.
+
+    A follow-up is answered locally only when every part of it is a recognised
+    filter, sort, top-N or projection over columns of a cached frame, and the
+    frame provably holds all the rows the answer needs. Anything else returns
+    None so the caller regenerates SQL.
+    """
+
+    def __init__(self, max_entries=5):
+        self._entries = deque(maxlen=max_entries)
+
+    def add(self, question, sql, frame):
+        self._entries.append(CachedResult.from_sql(question, sql, frame))
+
+    def clear(self):
+        self._entries.clear()
+
+    def answer(self, question):
+        """(frame, steps) for a follow-up answerable from cache, newest result first, else None."""
+        for entry in reversed(self._entries):
+            plan = plan_followup(question, entry)
+            if plan is not None:
+                result = apply_plan(entry, plan)
+                self._entries.append(result)
+                return result.frame, [step[-1] for step in plan]
+        return None
+
+
+def plan_followup(question, entry):
+    """Steps (kind, args..., description) that answer the question from entry, or None if that cannot be proven."""
+    text = re.sub(r"[^a-z0-9_ ,.\-]+", " ", question.lower()).replace(".", " ").strip()
+    text = re.sub(r"\s+", " ", text)
+    frame = entry.frame
+    steps = []
+
+    def consume(match):
+        nonlocal text
+        text = (text[:match.start()] + " " + text[match.end():]).strip()
+
+    match = SORT_PATTERN.search(text)
+    if match:
+        column = resolve_column(frame, match.group("column"))
+        if column is None:
+            return None
+        direction = match.group("direction")
+        descending = direction in ("desc", "descending") if direction else pd.api.types.is_numeric_dtype(frame[column])
+        steps.append(("sort", column, descending, f"sort by {column} {'desc' if descending else 'asc'}"))
+        consume(match)
+
+    match = COMPARE_PATTERN.search(text)
+    if match:
+        column = resolve_column(frame, match.group("column"))
+        if column is None or not pd.api.types.is_numeric_dtype(frame[column]):
+            return None
+        op = COMPARISONS[match.group("op")]
+        steps.append(("compare", column, op, float(match.group("value")), f"{column} {match.group('op')} {match.group('value')}"))
+        consume(match)
+
+    match = TOP_PATTERN.search(text)
+    if match:
+        n = int(match.group("n"))
+        steps.append(("top", n, f"top {n}"))
+        consume(match)
+
+    for pattern in (ONLY_PATTERN, SHOW_PATTERN):
+        match = pattern.search(text)
+        if not match:
+            continue
+        phrases = [phrase for phrase in re.split(r",|\band\b", match.group("phrase")) if phrase.strip()]
+        columns = [resolve_column(frame, phrase) for phrase in phrases]
+        if phrases and all(columns):
+            steps.append(("project", columns, f"columns {', '.join(columns)}"))
+        elif pattern is ONLY_PATTERN:
+            value = match.group("phrase").strip()
+            matching = [
+                column for column in frame.columns
+                if pd.api.types.is_string_dtype(frame[column]) and frame[column].astype(str).str.lower().eq(value).any()
+            ]
+            if len(matching) != 1:
+                return None
+            steps.append(("equals", matching[0], value, f"{matching[0]} = {value}"))
+        else:
+            return None
+        consume(match)
+
+    # Anything left over is a request the refinements above do not cover
+    if not steps or set(text.replace(",", " ").split()) - FILLER_WORDS:
+        return None
+
+    # Row-level refinements are only exact when the cached frame holds every row they depend on
+    order = entry.order
+    for step in steps:
+        kind = step[0]
+        if kind in ("compare", "equals") and not entry.complete:
+            return None
+        if kind == "sort":
+            if not entry.complete and order != (step[1], step[2]):
+                return None
+            order = (step[1], step[2])
+        if kind == "top" and (order is None or (not entry.complete and step[1] > len(frame))):
+            return None
+    return steps
+
+
+def apply_plan(entry, steps):
+    """Run the steps with pandas, in filter -> sort -> top-N -> projection order."""
+    frame = entry.frame
+    complete, order = entry.complete, entry.order
+    rank = {"compare": 0, "equals": 0, "sort": 1, "top": 2, "project": 3}
+    for step in sorted(steps, key=lambda step: rank[step[0]]):
+        kind = step[0]
+        if kind == "compare":
+            frame = frame[getattr(frame[step[1]], step[2])(step[3])]
+        elif kind == "equals":
+            frame = frame[frame[step[1]].astype(str).str.lower() == step[2]]
+        elif kind == "sort":
+            frame = frame.sort_values(step[1], ascending=not step[2], kind="stable")
+            order = (step[1], step[2])
+        elif kind == "top":
+            complete = complete and step[1] >= len(frame)
+            frame = frame.head(step[1])
+        elif kind == "project":
+            frame = frame[step[1]]
+            if order is not None and order[0] not in step[1]:
+                order = None
+    description = "; ".join(step[-1] for step in steps)
+    return CachedResult(f"{entry.question} ({description})", entry.sql, frame.reset_index(drop=True), complete, order)
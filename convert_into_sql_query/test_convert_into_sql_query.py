@@ -0,0 +1,30 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError, ProgrammingError
+
+import convert_into_sql_query
+from convert_into_sql_query import validate_sql
+
+
+def test_connection_errors_are_not_treated_as_bad_sql(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'missing' / 'db.sqlite'}")
+
+    with pytest.raises(OperationalError):
+        validate_sql(engine, "SELECT 1")
+
+
+def test_sql_the_database_rejects_escalates(monkeypatch):
+    class RejectingConnection:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def execute(self, statement):
+            raise ProgrammingError(str(statement), {}, Exception('syntax error at or near "order"'))
+
+    monkeypatch.setattr(convert_into_sql_query.governor, "db_connection", lambda engine: RejectingConnection())
+
+    with pytest.raises(ValueError, match="does not compile"):
+        validate_sql(None, "SELECT * FROM order")
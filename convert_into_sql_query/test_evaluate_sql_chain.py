@@ -0,0 +1,73 @@
+import os
+import json
+
+import pytest
+from sqlalchemy import create_engine, make_url, text
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+
+import prompt_assembler
+from convert_into_sql_query import connect_db, build_sql_chain
+from model_router import ModelRouter
+from evaluate_sql_chain import (
+    EVAL_DIR, drop_fixture, load_fixture, load_gold, results_match, run_evaluation, summarize, with_search_path,
+)
+
+
+def test_results_match_ignores_row_order_unless_ordered():
+    assert results_match([(1, "a"), (2, "b")], [(2, "b"), (1, "a")])
+    assert not results_match([(1, "a"), (2, "b")], [(2, "b"), (1, "a")], ordered=True)
+    assert results_match([(1.00001,)], [(1.0,)])
+    assert not results_match([(1,), (1,)], [(1,)])
+
+
+def score_gold_with_fake_model(db_url):
+    gold = load_gold(EVAL_DIR / "gold.jsonl")
+    answers = {item["question"]: item["sql"] for item in gold}
+    # Wrong on purpose for one question
+    answers[gold[0]["question"]] = "SELECT campaign_name, clicks FROM ads ORDER BY clicks ASC LIMIT 5"
+
+    def fake_llm(prompt, **kwargs):
+        question = next(question for question in answers if question in prompt.to_string())
+        return AIMessage(content=answers[question])
+
+    router = ModelRouter(routes={"sql": ["fake"]}, model_factory=lambda name: RunnableLambda(fake_llm))
+    chain = build_sql_chain(connect_db(db_url), router)
+    return gold, run_evaluation(chain, create_engine(db_url), gold, workers=4)
+
+
+def test_gold_file_is_scored_against_the_fixture(monkeypatch, tmp_path):
+    # Offline stand-in for the tokenizer download
+    monkeypatch.setattr(prompt_assembler, "tiktoken_counter", lambda model="gpt-4o-mini": lambda text: len(text.split()))
+
+    db_url, _ = load_fixture(f"sqlite:///{tmp_path / 'fixture.db'}")
+    gold, results = score_gold_with_fake_model(db_url)
+    summary = summarize(results)
+
+    assert [result["match"] for result in results] == [False] + [True] * (len(gold) - 1)
+    assert summary["accuracy"] == pytest.approx((len(gold) - 1) / len(gold))
+    assert summary["errors"] == 0
+    json.dumps(results, default=str)
+
+
+@pytest.mark.skipif(not os.getenv("EVAL_DB_URL"), reason="needs EVAL_DB_URL pointing at a scratch PostgreSQL database")
+def test_gold_file_is_scored_against_a_postgres_fixture_schema(monkeypatch):
+    monkeypatch.setattr(prompt_assembler, "tiktoken_counter", lambda model="gpt-4o-mini": lambda text: len(text.split()))
+
+    fixture_url, schema = load_fixture(os.environ["EVAL_DB_URL"])
+    try:
+        gold, results = score_gold_with_fake_model(fixture_url)
+        assert [result["error"] for result in results] == [None] * len(gold)
+        assert [result["match"] for result in results] == [False] + [True] * (len(gold) - 1)
+    finally:
+        drop_fixture(os.environ["EVAL_DB_URL"], schema)
+
+    with create_engine(os.environ["EVAL_DB_URL"]).connect() as connection:
+        assert connection.execute(text("SELECT count(*) FROM pg_namespace WHERE nspname = :schema"), {"schema": schema}).scalar() == 0
+
+
+def test_search_path_keeps_existing_connection_options():
+    url = with_search_path(make_url("postgresql://u:p@ep-x.neon.tech/db?sslmode=require&options=endpoint%3Dep-x"), "sql_eval_1")
+    assert url.query["options"] == "endpoint=ep-x -csearch_path=sql_eval_1"
+    assert url.query["sslmode"] == "require"
+    assert with_search_path(make_url("postgresql://u:p@h/db"), "s").query["options"] == "-csearch_path=s"
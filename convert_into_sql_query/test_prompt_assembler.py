@@ -0,0 +1,77 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+from langchain_community.utilities import SQLDatabase
+from langchain_core.language_models import FakeListChatModel
+from langchain_core.prompts import PromptTemplate
+
+from prompt_assembler import SchemaPromptAssembler, abbreviate_type, create_budgeted_sql_query_chain
+
+
+def count_words(text):
+    return len(text.split())
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    with engine.begin() as connection:
+        connection.execute(text(
+            'CREATE TABLE "order" (id INTEGER PRIMARY KEY, customer_email VARCHAR(255) NOT NULL, '
+            "total_price NUMERIC(10, 2), created_at TIMESTAMP, shipping_city TEXT, discount_code TEXT, note TEXT)"
+        ))
+        connection.execute(text("""INSERT INTO "order" VALUES (1, 'a@b.c', 12.5, '2024-01-01', 'Pune', 'X', 'hi')"""))
+    return SQLDatabase(engine, sample_rows_in_table_info=2)
+
+
+def test_full_schema_with_sample_rows_when_it_fits(db):
+    info = SchemaPromptAssembler(db, budget_tokens=1000, count_tokens=count_words).table_info("total price")
+    assert "rows from order table" in info
+    assert "VARCHAR(255) NOT NULL" in info
+
+
+@pytest.mark.parametrize("budget,present,absent", [
+    (40, ["VARCHAR(255)", "note"], ["rows from order table"]),
+    (22, ["customer_email text", "note text"], ["VARCHAR", "NOT NULL"]),
+    (12, ["id int", "total_price num", "shipping_city text", "PRIMARY KEY (id)"], ["note", "discount_code"]),
+])
+def test_schema_degrades_to_fit_the_budget(db, budget, present, absent):
+    info = SchemaPromptAssembler(db, budget_tokens=budget, count_tokens=count_words).table_info("total price by shipping city")
+    for fragment in present:
+        assert fragment in info
+    for fragment in absent:
+        assert fragment not in info
+
+
+def test_reserved_table_names_are_quoted_and_foreign_keys_kept():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE customer (id INTEGER PRIMARY KEY, email TEXT)"))
+        connection.execute(text(
+            'CREATE TABLE "order" (id INTEGER PRIMARY KEY, customer_id INTEGER REFERENCES customer (id), '
+            "total_price NUMERIC(10, 2), shipping_city TEXT, discount_code TEXT, note TEXT)"
+        ))
+    db = SQLDatabase(engine, sample_rows_in_table_info=0)
+
+    for budget in (1000, 15):
+        info = SchemaPromptAssembler(db, budget_tokens=budget, count_tokens=count_words).table_info("total price")
+        assert 'CREATE TABLE "order" (' in info
+        assert "FOREIGN KEY(customer_id) REFERENCES customer (id)" in info
+    assert "FOREIGN KEY(customer_id) REFERENCES customer (id)" in db.get_table_info(["order"])
+
+
+def test_abbreviate_type():
+    assert abbreviate_type("CHARACTER VARYING(255)") == "text"
+    assert abbreviate_type("TIMESTAMP WITHOUT TIME ZONE") == "ts"
+    assert abbreviate_type("NUMERIC(10, 2)") == "num"
+    assert abbreviate_type("UUID") == "uuid"
+
+
+def test_chain_logs_prompt_tokens(db, caplog):
+    assembler = SchemaPromptAssembler(db, budget_tokens=1000, count_tokens=count_words)
+    prompt = PromptTemplate.from_template("{table_info}\n\nTop {top_k}. {input}")
+    chain = create_budgeted_sql_query_chain(FakeListChatModel(responses=[" SELECT 1 "]), assembler, prompt)
+
+    with caplog.at_level("INFO", logger="prompt_assembler"):
+        assert chain.invoke({"question": "How many orders?"}) == "SELECT 1"
+    assert "SQL prompt:" in caplog.text
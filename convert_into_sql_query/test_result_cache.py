@@ -0,0 +1,103 @@
+import pandas as pd
+import pytest
+
+from result_cache import ResultCache, resolve_column
+
+
+@pytest.fixture
+def campaigns():
+    return pd.DataFrame({
+        "platform": ["Amazon", "TikTok", "Meta", "TikTok"],
+        "campaign_name": ["Spring Sale", "Creator Collab", "Lookalike US", "Spark Ads"],
+        "clicks": [1210, 2100, 900, 400],
+        "spend": [720.0, 820.0, 450.0, 210.0],
+    })
+
+
+def cache_with(frame, sql):
+    cache = ResultCache()
+    cache.add("campaigns", sql, frame)
+    return cache
+
+
+def test_resolve_column(campaigns):
+    assert resolve_column(campaigns, "campaign name") == "campaign_name"
+    assert resolve_column(campaigns, "Spends") == "spend"
+    assert resolve_column(campaigns, "revenue") is None
+
+
+def test_complete_result_is_refined_locally(campaigns):
+    cache = cache_with(campaigns, "SELECT platform, campaign_name, clicks, spend FROM ads ORDER BY clicks DESC")
+
+    frame, steps = cache.answer("sort by spend instead")
+    assert frame["spend"].tolist() == [820.0, 720.0, 450.0, 210.0]
+    assert steps == ["sort by spend desc"]
+
+    frame, _ = cache.answer("only tiktok")
+    assert frame["campaign_name"].tolist() == ["Creator Collab", "Spark Ads"]
+
+    frame, _ = cache.answer("show campaign name and clicks")
+    assert list(frame.columns) == ["campaign_name", "clicks"]
+
+
+def test_followups_chain_on_the_newest_result(campaigns):
+    cache = cache_with(campaigns, "SELECT platform, campaign_name, clicks, spend FROM ads")
+
+    cache.answer("sort by clicks")
+    frame, _ = cache.answer("top 2")
+    assert frame["campaign_name"].tolist() == ["Creator Collab", "Spring Sale"]
+
+
+def test_truncated_result_only_allows_refinements_it_can_prove(campaigns):
+    top = campaigns.sort_values("clicks", ascending=False).head(3)
+    cache = cache_with(top, "SELECT platform, campaign_name, clicks, spend FROM ads ORDER BY clicks DESC LIMIT 3")
+
+    # Re-sorting or filtering a top-3 answers a different question than asking the database
+    assert cache.answer("sort by spend instead") is None
+    assert cache.answer("only tiktok") is None
+    assert cache.answer("with spend above 500") is None
+
+    frame, _ = cache.answer("top 2")
+    assert frame["clicks"].tolist() == [2100, 1210]
+    frame, _ = cache.answer("just campaign name")
+    assert list(frame.columns) == ["campaign_name"]
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT platform, campaign_name, clicks, spend FROM ads ORDER BY clicks DESC LIMIT 3 OFFSET 0",
+    "SELECT platform, campaign_name, clicks, spend FROM ads ORDER BY clicks DESC FETCH FIRST 3 ROWS ONLY",
+    "SELECT * FROM (SELECT platform, campaign_name, clicks, spend FROM ads ORDER BY clicks DESC LIMIT 3) t ORDER BY clicks DESC",
+    "SELECT TOP 3 platform, campaign_name, clicks, spend FROM ads ORDER BY clicks DESC",
+])
+def test_any_row_limit_marks_the_result_incomplete(campaigns, sql):
+    cache = cache_with(campaigns.sort_values("clicks", ascending=False).head(3), sql)
+
+    assert cache.answer("sort by spend instead") is None
+    assert cache.answer("only tiktok") is None
+    frame, _ = cache.answer("top 2")
+    assert frame["clicks"].tolist() == [2100, 1210]
+
+
+@pytest.mark.parametrize("sql", [
+    # Window and subquery orderings say nothing about the order of the result rows
+    "SELECT platform, campaign_name, clicks, spend, rank() OVER (ORDER BY clicks DESC) FROM ads",
+    "SELECT * FROM (SELECT platform, campaign_name, clicks, spend FROM ads ORDER BY clicks DESC) t",
+    "SELECT platform, campaign_name, clicks, spend FROM ads ORDER BY SUM(clicks) DESC",
+])
+def test_order_comes_only_from_a_plain_outermost_order_by(campaigns, sql):
+    assert cache_with(campaigns, sql).answer("top 2") is None
+
+
+def test_outermost_order_by_wins_over_window_order(campaigns):
+    frame = campaigns.sort_values("spend").reset_index(drop=True)
+    cache = cache_with(frame, "SELECT platform, campaign_name, clicks, spend, rank() OVER (ORDER BY clicks DESC) AS r FROM ads ORDER BY 4")
+
+    assert cache.answer("top 2")[0]["spend"].tolist() == [210.0, 450.0]
+
+
+def test_new_questions_go_back_to_the_database(campaigns):
+    cache = cache_with(campaigns, "SELECT platform, campaign_name, clicks, spend FROM ads")
+
+    assert cache.answer("top 5 orders by revenue per city") is None
+    assert cache.answer("only google ads") is None
+    assert cache.answer("sort by impressions") is None
@@ -0,0 +1,226 @@
+import os
+import time
+import uuid
+import threading
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from types import SimpleNamespace
+
+# Requests and tokens per minute for each model (OpenAI tier 1 defaults).
+# Override with LLM_RATE_LIMITS="gpt-4o=5000:800000,gpt-4o-mini=5000:4000000".
+DEFAULT_MODEL_LIMITS = {
+    "gpt-4o-mini": (500, 200_000),
+    "gpt-4o": (500, 30_000),
+    "gpt-4-0125-preview": (500, 30_000),
+}
+FALLBACK_MODEL_LIMITS = (500, 30_000)
+
+# Identity of the calling Streamlit session and how to show its queue position
+_session_id = ContextVar("governor_session_id", default="default")
+_on_wait = ContextVar("governor_on_wait", default=None)
+
+
+def bind_session(session_id, on_wait=None):
+    """Attribute calls made from this thread to a session.
+
+    on_wait(position) is called while the call is queued and on_wait(None)
+    once it has been admitted, so the UI can show and clear the queue position.
+    """
+    _session_id.set(session_id)
+    _on_wait.set(on_wait)
+
+
+def show_queue_position(st):
+    """Bind this Streamlit session and show its queue position in a placeholder at the current spot.
+
+    Takes the streamlit module so this file does not depend on it.
+    """
+    if "session_id" not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
+    queue_status = st.empty()
+
+    def on_wait(position):
+        if position is None:
+            queue_status.empty()
+        else:
+            queue_status.info(f"⏳ Waiting in queue (position {position + 1})")
+
+    bind_session(st.session_state.session_id, on_wait=on_wait)
+
+
+def background_context():
+    """Copy of the current context for work run on another thread.
+
+    Keeps the session but drops on_wait, which draws Streamlit elements and
+    needs the script thread's ScriptRunContext.
+    """
+    context = copy_context()
+    context.run(_on_wait.set, None)
+    return context
+
+
+def estimate_tokens(text, max_output_tokens=256):
+    # ~4 characters per token; corrected with the real usage after the call
+    return len(str(text)) // 4 + max_output_tokens
+
+
+class TokenBucket:
+    """Refills at per_minute / 60 units a second up to one minute's worth. Not thread-safe."""
+
+    def __init__(self, per_minute):
+        self.rate = per_minute / 60.0
+        self.capacity = float(per_minute)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount):
+        self._refill()
+        needed = min(amount, self.capacity) - self.tokens
+        return max(0.0, needed / self.rate)
+
+    def take(self, amount):
+        # May go negative when actual usage exceeds the estimate; that debt delays later calls.
+        # A negative amount hands capacity back.
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - amount)
+
+
+class Governor:
+    """Process-wide rate limiter and concurrency cap shared by every Streamlit session.
+
+    Each resource (one per model, plus the database) has its own queue. Waiting
+    calls are admitted round-robin across sessions, so one busy session cannot
+    starve the others, and only when the resource has capacity, so throughput
+    stays at the provider limit instead of turning into 429 retries.
+    """
+
+    def __init__(self, model_limits=None, db_max_concurrent=None):
+        self.model_limits = dict(model_limits or DEFAULT_MODEL_LIMITS)
+        for item in os.getenv("LLM_RATE_LIMITS", "").split(","):
+            if "=" in item:
+                model, limits = item.split("=", 1)
+                rpm, tpm = limits.split(":")
+                self.model_limits[model.strip()] = (int(rpm), int(tpm))
+        self.db_max_concurrent = db_max_concurrent or int(os.getenv("DB_MAX_CONCURRENT_STATEMENTS", 5))
+        self._buckets = {}
+        self._db_active = 0
+        self._queues = {}
+        self._cond = threading.Condition()
+
+    def _model_buckets(self, model):
+        if model not in self._buckets:
+            rpm, tpm = self.model_limits.get(model, FALLBACK_MODEL_LIMITS)
+            self._buckets[model] = (TokenBucket(rpm), TokenBucket(tpm))
+        return self._buckets[model]
+
+    @staticmethod
+    def _position(queue, session_id, ticket):
+        # Place in the round-robin order: every session's first ticket, then every second, ...
+        index = queue[session_id].index(ticket)
+        ahead = 0
+        seen_self = False
+        for other, tickets in queue.items():
+            if other == session_id:
+                seen_self = True
+                ahead += index
+            else:
+                ahead += min(len(tickets), index if seen_self else index + 1)
+        return ahead
+
+    def _acquire(self, resource, wait_time, grant):
+        session_id, on_wait = _session_id.get(), _on_wait.get()
+        ticket = object()
+        last_position = None
+        with self._cond:
+            queue = self._queues.setdefault(resource, OrderedDict())
+            queue.setdefault(session_id, deque()).append(ticket)
+            try:
+                while True:
+                    position = self._position(queue, session_id, ticket)
+                    delay = None
+                    if position == 0:
+                        delay = wait_time()
+                        if delay == 0:
+                            grant()
+                            break
+                    if on_wait is not None and position != last_position:
+                        last_position = position
+                        self._cond.release()
+                        try:
+                            on_wait(position)
+                        finally:
+                            self._cond.acquire()
+                    self._cond.wait(timeout=delay)
+            finally:
+                tickets = queue[session_id]
+                tickets.remove(ticket)
+                if tickets:
+                    queue.move_to_end(session_id)
+                else:
+                    del queue[session_id]
+                self._cond.notify_all()
+        if on_wait is not None and last_position is not None:
+            on_wait(None)
+
+    @contextmanager
+    def llm_slot(self, model, tokens):
+        """Admit one request of about `tokens` tokens to `model`.
+
+        Set slot.tokens to the real usage inside the block to correct the estimate,
+        and slot.requests to 0 when the request was admitted but never sent.
+        """
+        requests, token_bucket = self._model_buckets(model)
+
+        def wait_time():
+            return max(requests.wait_time(1), token_bucket.wait_time(tokens))
+
+        def grant():
+            requests.take(1)
+            token_bucket.take(tokens)
+
+        self._acquire(f"llm:{model}", wait_time, grant)
+        slot = SimpleNamespace(tokens=tokens, requests=1)
+        try:
+            yield slot
+        finally:
+            if slot.tokens != tokens or slot.requests != 1:
+                with self._cond:
+                    token_bucket.take(slot.tokens - tokens)
+                    requests.take(slot.requests - 1)
+                    self._cond.notify_all()
+
+    @contextmanager
+    def db_connection(self, engine):
+        """Check out a connection once fewer than db_max_concurrent statements are running."""
+
+        def wait_time():
+            return 0 if self._db_active < self.db_max_concurrent else None
+
+        def grant():
+            self._db_active += 1
+
+        self._acquire("db", wait_time, grant)
+        try:
+            with engine.connect() as connection:
+                yield connection
+        finally:
+            with self._cond:
+                self._db_active -= 1
+                self._cond.notify_all()
+
+    def snapshot(self):
+        with self._cond:
+            return {
+                "db_active": self._db_active,
+                "queued": {resource: sum(len(tickets) for tickets in queue.values()) for resource, queue in self._queues.items()},
+            }
+
+
+# Shared by every session served by this process
+governor = Governor()
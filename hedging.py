@@ -0,0 +1,235 @@
+import os
+import time
+import asyncio
+import threading
+from collections import deque
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from langchain_core.runnables import Runnable
+
+from governor import background_context
+
+# Worker threads for the synchronous path; duplicate requests need their own slot
+_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="hedge")
+
+# Every hedged runnable, so apps can report on all of them
+_registry = []
+_registry_lock = threading.Lock()
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class HedgedRunnable(Runnable):
+    """Fire a duplicate request when the first has not finished by the latency percentile deadline.
+
+    Whichever attempt completes first wins and the other is cancelled. Until
+    min_samples latencies have been observed, initial_deadline (seconds) is used.
+    At most budget * requests duplicates are sent. backup_slot(input), if given,
+    returns a context manager the duplicate request runs inside, such as a
+    governor.llm_slot, so rate limits count it; a duplicate still waiting for
+    its slot when the primary finishes is never sent.
+    """
+
+    def __init__(self, runnable, name=None, percentile=None, budget=None, min_samples=20, initial_deadline=3.0, window=500, backup_slot=None):
+        self.runnable = runnable
+        self.backup_slot = backup_slot
+        self.name = name or getattr(runnable, "model_name", type(runnable).__name__)
+        self.percentile = float(percentile if percentile is not None else os.getenv("HEDGE_PERCENTILE", 95))
+        self.budget = float(budget if budget is not None else os.getenv("HEDGE_BUDGET", 0.05))
+        self.min_samples = min_samples
+        self.initial_deadline = initial_deadline
+        self._latencies = deque(maxlen=window)
+        self._totals = deque(maxlen=window)
+        self._unhedged = deque(maxlen=window)
+        self._requests = 0
+        self._hedges = 0
+        self._reserved_hedges = 0
+        self._hedge_wins = 0
+        self._lock = threading.Lock()
+        with _registry_lock:
+            _registry.append(self)
+
+    def deadline(self):
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return self.initial_deadline
+            return _percentile(self._latencies, self.percentile)
+
+    def _allow_hedge(self):
+        # Reserve budget for a duplicate; it only counts as a hedge once it is sent
+        with self._lock:
+            if self._hedges + self._reserved_hedges + 1 > self.budget * self._requests:
+                return False
+            self._reserved_hedges += 1
+            return True
+
+    def _settle_hedge(self, sent):
+        with self._lock:
+            self._reserved_hedges -= 1
+            self._hedges += sent
+
+    @staticmethod
+    def _refund(slot):
+        # A duplicate admitted after the primary won is never sent: give back its request and tokens
+        slot.requests = 0
+        slot.tokens = 0
+
+    def _attempt(self, input, config, kwargs):
+        start = time.perf_counter()
+        result = self.runnable.invoke(input, config, **kwargs)
+        latency = time.perf_counter() - start
+        with self._lock:
+            self._latencies.append(latency)
+        return result, latency
+
+    async def _aattempt(self, input, config, kwargs):
+        start = time.perf_counter()
+        result = await self.runnable.ainvoke(input, config, **kwargs)
+        latency = time.perf_counter() - start
+        with self._lock:
+            self._latencies.append(latency)
+        return result, latency
+
+    def _backup_attempt(self, input, config, kwargs, settled):
+        with self.backup_slot(input) if self.backup_slot else nullcontext() as slot:
+            if settled.is_set():
+                # The primary finished while the duplicate queued
+                if slot is not None:
+                    self._refund(slot)
+                self._settle_hedge(sent=False)
+                return None, None
+            self._settle_hedge(sent=True)
+            return self._attempt(input, config, kwargs)
+
+    async def _abackup_attempt(self, input, config, kwargs):
+        if self.backup_slot is None:
+            self._settle_hedge(sent=True)
+            return await self._aattempt(input, config, kwargs)
+        # The governor blocks, so wait for the slot on a worker thread. If this
+        # attempt is cancelled meanwhile the thread still gets the slot, so
+        # release it unused once it does.
+        slot_manager = self.backup_slot(input)
+        entering = asyncio.ensure_future(asyncio.to_thread(slot_manager.__enter__))
+        try:
+            slot = await asyncio.shield(entering)
+        except asyncio.CancelledError:
+            entering.add_done_callback(lambda future: self._release_unused(slot_manager, future))
+            raise
+        self._settle_hedge(sent=True)
+        try:
+            return await self._aattempt(input, config, kwargs)
+        finally:
+            slot_manager.__exit__(None, None, None)
+
+    def _release_unused(self, slot_manager, entering):
+        self._settle_hedge(sent=False)
+        if not entering.cancelled() and entering.exception() is None:
+            self._refund(entering.result())
+            slot_manager.__exit__(None, None, None)
+
+    def _record(self, start, primary_latency, hedge_won):
+        # primary_latency is None when the primary lost and its latency is
+        # recorded separately (or never, when it was cancelled or failed)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self._totals.append(elapsed)
+            if primary_latency is not None:
+                self._unhedged.append(primary_latency)
+            self._hedge_wins += hedge_won
+
+    def _record_unhedged(self, primary):
+        # Done-callback of a losing synchronous primary: its real latency is
+        # what the request would have taken without hedging
+        if not primary.cancelled() and primary.exception() is None:
+            with self._lock:
+                self._unhedged.append(primary.result()[1])
+
+    def invoke(self, input, config=None, **kwargs):
+        start = time.perf_counter()
+        with self._lock:
+            self._requests += 1
+        primary = _executor.submit(background_context().run, self._attempt, input, config, kwargs)
+        done, _ = wait([primary], timeout=self.deadline())
+        if done or not self._allow_hedge():
+            result, latency = primary.result()
+            self._record(start, latency, hedge_won=False)
+            return result
+
+        # Threads cannot be interrupted, so a losing attempt that already
+        # started runs to completion in the background and is ignored
+        settled = threading.Event()
+        backup = _executor.submit(background_context().run, self._backup_attempt, input, config, kwargs, settled)
+        pending = {primary, backup}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            winner = done.pop()
+            if winner.exception() is None or not pending:
+                break
+        settled.set()
+        for loser in pending:
+            loser.cancel()
+        if winner.exception() is not None:
+            raise primary.exception() or winner.exception()
+        result, latency = winner.result()
+        self._record(start, latency if winner is primary else None, hedge_won=winner is backup)
+        if winner is backup:
+            primary.add_done_callback(self._record_unhedged)
+        return result
+
+    async def ainvoke(self, input, config=None, **kwargs):
+        start = time.perf_counter()
+        with self._lock:
+            self._requests += 1
+        primary = asyncio.ensure_future(self._aattempt(input, config, kwargs))
+        done, _ = await asyncio.wait({primary}, timeout=self.deadline())
+        if done or not self._allow_hedge():
+            result, latency = await primary
+            self._record(start, latency, hedge_won=False)
+            return result
+
+        backup = asyncio.ensure_future(self._abackup_attempt(input, config, kwargs))
+        pending = {primary, backup}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            winner = done.pop()
+            if winner.exception() is None or not pending:
+                break
+        for loser in pending:
+            loser.cancel()
+        if winner.exception() is not None:
+            raise primary.exception() or winner.exception()
+        result, latency = winner.result()
+        # A cancelled async primary never finishes, so the elapsed time is the
+        # only (lower-bound) estimate of its latency
+        self._record(start, latency if winner is primary else time.perf_counter() - start, hedge_won=winner is backup)
+        return result
+
+    def stats(self):
+        with self._lock:
+            p99 = _percentile(self._totals, 99)
+            p99_unhedged = _percentile(self._unhedged, 99)
+            return {
+                "model": self.name,
+                "requests": self._requests,
+                "hedges": self._hedges,
+                "hedge_rate": self._hedges / self._requests if self._requests else 0.0,
+                "hedge_wins": self._hedge_wins,
+                "p50_s": _percentile(self._totals, 50),
+                "p99_s": p99,
+                # Losing sync primaries count with their real latency once they finish;
+                # cancelled async primaries only with the elapsed time (a lower bound)
+                "p99_saved_s": max(0.0, p99_unhedged - p99),
+            }
+
+
+def report():
+    """Stats for every hedged runnable created in this process."""
+    with _registry_lock:
+        return [hedged.stats() for hedged in _registry]
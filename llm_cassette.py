@@ -0,0 +1,122 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from pathlib import Path
+from typing import Any, Optional
+
+from langchain_openai import ChatOpenAI
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+# Loaded cassette files, shared so every model reading the same file sees new recordings
+_cassettes = {}
+_cassettes_lock = threading.Lock()
+
+
+class CassetteMiss(LookupError):
+    """A prompt with no recorded response. Not a ValueError, so the model router does not escalate it."""
+
+
+def _cassette(path):
+    # Callers hold _cassettes_lock
+    if path not in _cassettes:
+        _cassettes[path] = json.loads(Path(path).read_text()) if Path(path).exists() else {}
+    return _cassettes[path]
+
+
+def _load(path):
+    with _cassettes_lock:
+        return _cassette(path)
+
+
+def _save(path, key, entry):
+    # Merge into the file's existing recordings so re-recording one prompt keeps the rest
+    with _cassettes_lock:
+        cassette = _cassette(path)
+        cassette[key] = entry
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        Path(path).write_text(json.dumps(cassette, indent=2, sort_keys=True, ensure_ascii=False) + "\n")
+
+
+def synthetic_entries(path):
+    """Number of entries in a cassette marked "synthetic": written by hand, not recorded from the model."""
+    return sum(bool(entry.get("synthetic")) for entry in _load(str(path)).values())
+
+
+class CassetteChatModel(BaseChatModel):
+    """Chat model that records request->response pairs to a JSON fixture, or replays them.
+
+    mode is "record" (call `inner` and save the response) or "replay" (serve the
+    saved response, raising CassetteMiss for unknown prompts). Replays sleep for
+    `latency` seconds, or for the recorded latency when latency is "recorded".
+    """
+
+    model_name: str
+    cassette_path: str
+    mode: str = "replay"
+    latency: Any = 0.0
+    inner: Optional[BaseChatModel] = None
+
+    @property
+    def _llm_type(self):
+        return "cassette"
+
+    def _key(self, messages, stop):
+        request = {
+            "model": self.model_name,
+            "messages": [[message.type, message.content] for message in messages],
+            "stop": stop,
+        }
+        return hashlib.sha256(json.dumps(request, sort_keys=True).encode()).hexdigest()
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        key = self._key(messages, stop)
+        if self.mode == "record":
+            start = time.perf_counter()
+            message = self.inner.invoke(messages, stop=stop, **kwargs)
+            entry = {
+                "model": self.model_name,
+                "prompt": [f"{m.type}: {m.content}" for m in messages],
+                "response": message.content,
+                "usage": message.usage_metadata,
+                "latency_s": round(time.perf_counter() - start, 3),
+            }
+            _save(self.cassette_path, key, entry)
+        else:
+            entry = _load(self.cassette_path).get(key)
+            if entry is None:
+                prompt = "\n".join(f"{m.type}: {m.content}" for m in messages)
+                raise CassetteMiss(
+                    f"No recorded {self.model_name} response for this prompt in {self.cassette_path}. "
+                    f"Re-record with LLM_CASSETTE_MODE=record if the prompt changed on purpose.\n{prompt}"
+                )
+            delay = entry.get("latency_s", 0.0) if self.latency == "recorded" else float(self.latency)
+            if delay:
+                time.sleep(delay)
+
+        message = AIMessage(
+            content=entry["response"],
+            usage_metadata=entry.get("usage"),
+            response_metadata={"model_name": self.model_name},
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def cassette_model_factory(cassette_path, default_mode="replay", temperature=0):
+    """Model factory for ModelRouter, configured by LLM_CASSETTE_MODE (record/replay/off)
+    and LLM_CASSETTE_LATENCY (seconds, or "recorded")."""
+    mode = os.getenv("LLM_CASSETTE_MODE", default_mode)
+    latency = os.getenv("LLM_CASSETTE_LATENCY", "0")
+    latency = latency if latency == "recorded" else float(latency)
+
+    def factory(name):
+        if mode == "off":
+            return ChatOpenAI(model=name, temperature=temperature)
+        # No API key is needed to replay, so only build the real model when recording
+        inner = ChatOpenAI(model=name, temperature=temperature) if mode == "record" else None
+        return CassetteChatModel(model_name=name, cassette_path=str(cassette_path), mode=mode, latency=latency, inner=inner)
+
+    return factory
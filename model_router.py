@@ -0,0 +1,128 @@
+import os
+import time
+import threading
+from dataclasses import dataclass
+
+from langchain_openai import ChatOpenAI
+from langchain_core.runnables import RunnableLambda
+from langchain_community.callbacks import get_openai_callback
+
+from hedging import HedgedRunnable
+from governor import governor, estimate_tokens
+
+# Model tiers per task, cheapest/fastest first. Override a task with an
+# environment variable such as MODEL_ROUTE_CLASSIFICATION="gpt-4o-mini,gpt-4o".
+DEFAULT_ROUTES = {
+    "classification": ["gpt-4o-mini", "gpt-4o"],
+    "sql": ["gpt-4o-mini", "gpt-4-0125-preview"],
+}
+
+
+@dataclass
+class RouteStats:
+    task: str
+    model: str
+    calls: int = 0
+    failures: int = 0
+    escalations: int = 0
+    total_latency: float = 0.0
+    total_cost: float = 0.0
+    total_tokens: int = 0
+
+    def as_dict(self):
+        return {
+            "task": self.task,
+            "model": self.model,
+            "calls": self.calls,
+            "failures": self.failures,
+            "escalation_rate": self.escalations / self.calls if self.calls else 0.0,
+            "avg_latency_s": self.total_latency / self.calls if self.calls else 0.0,
+            "total_cost_usd": self.total_cost,
+            "total_tokens": self.total_tokens,
+        }
+
+
+class ModelRouter:
+    """Send each task to its cheapest model, escalating when the output does not parse or validate."""
+
+    def __init__(self, routes=None, model_factory=None, temperature=0, hedge=None):
+        self.routes = {task: list(models) for task, models in (routes or DEFAULT_ROUTES).items()}
+        for task in self.routes:
+            override = os.getenv(f"MODEL_ROUTE_{task.upper()}")
+            if override:
+                self.routes[task] = [model.strip() for model in override.split(",") if model.strip()]
+        self.model_factory = model_factory or (lambda name: ChatOpenAI(model=name, temperature=temperature))
+        # Opt-in tail-latency hedging of every model call (see hedging.py)
+        if hedge is None:
+            hedge = os.getenv("HEDGE_LLM_CALLS", "").lower() in ("1", "true", "yes")
+        self.hedge = hedge
+        self._models = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def model(self, name):
+        with self._lock:
+            if name not in self._models:
+                model = self.model_factory(name)
+                # The routed call holds one governor slot; each duplicate request takes another
+                self._models[name] = HedgedRunnable(
+                    model, name=name, backup_slot=lambda input: governor.llm_slot(name, estimate_tokens(input))
+                ) if self.hedge else model
+            return self._models[name]
+
+    def invoke(self, task, build_chain, inputs, validate=None):
+        """Run build_chain(llm) on each tier of the task's route until one produces a valid result.
+
+        Parser errors (OutputParserException is a ValueError) and ValueErrors raised by
+        validate escalate to the next tier; the last tier's error is re-raised.
+        """
+        tiers = self.routes[task]
+        for tier, name in enumerate(tiers):
+            # Wait for rate-limit capacity first so queueing is not counted as model latency
+            with governor.llm_slot(name, estimate_tokens(inputs)) as slot, get_openai_callback() as usage:
+                start = time.perf_counter()
+                try:
+                    result = build_chain(self.model(name)).invoke(inputs)
+                    if validate is not None:
+                        validate(result)
+                except ValueError:
+                    escalating = tier < len(tiers) - 1
+                    self._record(task, name, start, usage, failed=True, escalated=escalating)
+                    if not escalating:
+                        raise
+                    continue
+                finally:
+                    slot.tokens = usage.total_tokens or slot.tokens
+            self._record(task, name, start, usage)
+            return result
+
+    def chain(self, task, build_chain, validate=None):
+        """Wrap the routing in a runnable so callers keep using chain.invoke(inputs)."""
+        return RunnableLambda(lambda inputs: self.invoke(task, build_chain, inputs, validate))
+
+    def _record(self, task, name, start, usage, failed=False, escalated=False):
+        with self._lock:
+            stats = self._stats.setdefault((task, name), RouteStats(task, name))
+            stats.calls += 1
+            stats.failures += failed
+            stats.escalations += escalated
+            stats.total_latency += time.perf_counter() - start
+            stats.total_cost += usage.total_cost
+            stats.total_tokens += usage.total_tokens
+
+    def stats(self):
+        with self._lock:
+            return [stats.as_dict() for stats in self._stats.values()]
+
+
+def require_choice(key, choices):
+    """Validator for parsed dict outputs whose key must be one of the allowed labels."""
+    def validate(result):
+        value = str(result.get(key, "")).lower()
+        if value not in choices:
+            raise ValueError(f"Expected '{key}' to be one of {sorted(choices)}, got {value!r}")
+    return validate
+
+
+# Process-wide router shared by the apps so stats accumulate across sessions
+router = ModelRouter()
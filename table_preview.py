@@ -0,0 +1,227 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import streamlit as st
+from sqlalchemy import text
+
+from governor import governor, bind_session
+
+# Data preview settings: rows per page and the estimated size above which
+# a TABLESAMPLE random sample is offered instead of paging from the start
+PREVIEW_PAGE_SIZE = 50
+LARGE_TABLE_ROWS = 1_000_000
+
+# Background worker used to prefetch the next preview page, shared by every session
+_prefetch_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="preview")
+
+
+def qualified_table(engine, schema_name, table_name):
+    quote = engine.dialect.identifier_preparer.quote
+    return f"{quote(schema_name)}.{quote(table_name)}"
+
+
+def fetch_table_key(engine, schema_name, table_name):
+    """Primary key columns (empty when the table has none) and the planner's row estimate."""
+    relation = qualified_table(engine, schema_name, table_name)
+    key_query = """
+        SELECT a.attname
+        FROM pg_index i
+        JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
+        WHERE i.indrelid = to_regclass(:relation) AND i.indisprimary
+        ORDER BY array_position(i.indkey::int2[], a.attnum);
+    """
+    count_query = "SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:relation);"
+    with governor.db_connection(engine) as connection:
+        key_columns = [row[0] for row in connection.execute(text(key_query), {"relation": relation})]
+        estimated_rows = connection.execute(text(count_query), {"relation": relation}).scalar() or 0
+    return key_columns, max(estimated_rows, 0)
+
+
+def fetch_preview_page(engine, schema_name, table_name, key_columns, after=None, page_size=PREVIEW_PAGE_SIZE):
+    """One page of rows after the given key, using keyset pagination (no OFFSET).
+
+    Tables without a primary key are paged by ctid, which Postgres 14+ range-scans.
+    Returns the page and the cursor of the next one (None on the last page).
+    """
+    quote = engine.dialect.identifier_preparer.quote
+    relation = qualified_table(engine, schema_name, table_name)
+    if key_columns:
+        select = f"SELECT * FROM {relation}"
+        order_by = ", ".join(quote(column) for column in key_columns)
+        key_names = list(key_columns)
+        cast = "{}"
+    else:
+        select = f"SELECT ctid::text AS _ctid, * FROM {relation}"
+        order_by = "ctid"
+        key_names = ["_ctid"]
+        cast = "CAST({} AS tid)"
+
+    params = {"limit": page_size}
+    where = ""
+    if after is not None:
+        placeholders = ", ".join(cast.format(f":k{i}") for i in range(len(after)))
+        where = f" WHERE ({order_by}) > ({placeholders})"
+        params.update({f"k{i}": value for i, value in enumerate(after)})
+
+    with governor.db_connection(engine) as connection:
+        result = connection.execute(text(f"{select}{where} ORDER BY {order_by} LIMIT :limit"), params)
+        rows = result.fetchall()
+        df = pd.DataFrame(rows, columns=list(result.keys()))
+
+    # Take the next cursor from the raw rows so values keep their DB-API types
+    next_after = None
+    if len(rows) == page_size:
+        next_after = tuple(rows[-1]._mapping[name] for name in key_names)
+    return df.drop(columns=["_ctid"], errors="ignore"), next_after
+
+
+def sample_percent(estimated_rows, page_size=PREVIEW_PAGE_SIZE):
+    # About 10x the rows needed, with no lower bound, so the sampled set stays the same size however big the table is
+    return min(100.0, page_size * 1000.0 / max(estimated_rows, 1))
+
+
+def fetch_sample(engine, schema_name, table_name, estimated_rows, page_size=PREVIEW_PAGE_SIZE):
+    """Random rows from a very large table.
+
+    SYSTEM samples whole pages, about 10x more rows than needed, so the cost depends
+    on the sample size and not the table size. The sampled rows come back in block
+    order, so they are shuffled before the LIMIT to draw from every sampled page.
+    """
+    percent = sample_percent(estimated_rows, page_size)
+    query = (
+        f"SELECT * FROM {qualified_table(engine, schema_name, table_name)} "
+        "TABLESAMPLE SYSTEM (:percent) ORDER BY random() LIMIT :limit"
+    )
+    with governor.db_connection(engine) as connection:
+        result = connection.execute(text(query), {"percent": percent, "limit": page_size})
+        return pd.DataFrame(result.fetchall(), columns=list(result.keys()))
+
+
+# Runs on the prefetch thread, which has no session of its own
+def _prefetch_preview_page(session_id, *args):
+    bind_session(session_id)
+    return fetch_preview_page(*args)
+
+
+def _load_preview_page(engine, after):
+    # Show the page starting after the given cursor, then prefetch the one after it
+    preview = st.session_state.preview
+    prefetch = st.session_state.preview_prefetch
+    if prefetch and prefetch[0] == (preview["schema"], preview["table"], after):
+        df, next_after = prefetch[1].result()
+    else:
+        df, next_after = fetch_preview_page(engine, preview["schema"], preview["table"], preview["key_columns"], after)
+    preview["df"] = df
+    preview["next_after"] = next_after
+
+    st.session_state.preview_prefetch = None
+    if next_after is not None:
+        future = _prefetch_executor.submit(
+            _prefetch_preview_page, st.session_state.session_id,
+            engine, preview["schema"], preview["table"], preview["key_columns"], next_after
+        )
+        st.session_state.preview_prefetch = ((preview["schema"], preview["table"], next_after), future)
+
+
+# Button callbacks run before the script binds the session, so they bind
+# it themselves, and keep failures for the UI to show
+def _next_preview_page(engine):
+    bind_session(st.session_state.session_id)
+    preview = st.session_state.preview
+    try:
+        after = preview["next_after"]
+        _load_preview_page(engine, after)
+        preview["cursors"].append(after)
+        preview["error"] = None
+    except Exception as e:
+        preview["error"] = str(e)
+
+
+def _previous_preview_page(engine):
+    bind_session(st.session_state.session_id)
+    preview = st.session_state.preview
+    try:
+        _load_preview_page(engine, preview["cursors"][-2])
+        preview["cursors"].pop()
+        preview["error"] = None
+    except Exception as e:
+        preview["error"] = str(e)
+
+
+def _toggle_preview_sample(engine):
+    bind_session(st.session_state.session_id)
+    preview = st.session_state.preview
+    try:
+        preview["sample"] = st.session_state.preview_sample
+        if preview["sample"]:
+            preview["df"] = fetch_sample(engine, preview["schema"], preview["table"], preview["estimated_rows"])
+        else:
+            _load_preview_page(engine, None)
+            preview["cursors"] = [None]
+        preview["error"] = None
+    except Exception as e:
+        preview["error"] = str(e)
+
+
+def _resample_preview(engine):
+    bind_session(st.session_state.session_id)
+    preview = st.session_state.preview
+    try:
+        preview["df"] = fetch_sample(engine, preview["schema"], preview["table"], preview["estimated_rows"])
+        preview["error"] = None
+    except Exception as e:
+        preview["error"] = str(e)
+
+
+def show_table_preview(engine, schema_name, table_name):
+    """Step 3 of the schema explorers: a paged (or sampled) preview of the selected table.
+
+    Expects st.session_state.session_id to be set and bound with bind_session.
+    """
+    if "preview" not in st.session_state:
+        st.session_state.preview = None
+    if "preview_prefetch" not in st.session_state:
+        st.session_state.preview_prefetch = None
+
+    if st.button("👀 Preview Data"):
+        try:
+            key_columns, estimated_rows = fetch_table_key(engine, schema_name, table_name)
+            st.session_state.preview = {
+                "schema": schema_name,
+                "table": table_name,
+                "key_columns": key_columns,
+                "estimated_rows": estimated_rows,
+                "sample": False,
+                "cursors": [None],
+                "error": None,
+            }
+            _load_preview_page(engine, None)
+        except Exception as e:
+            st.session_state.preview = None
+            st.error(f"Error previewing data: {e}")
+
+    preview = st.session_state.preview
+    if not (preview and preview["schema"] == schema_name and preview["table"] == table_name):
+        return
+
+    st.success(f"👀 Preview of `{table_name}`:")
+    if preview["estimated_rows"] > LARGE_TABLE_ROWS:
+        st.toggle(
+            f"Random sample (table has ~{preview['estimated_rows']:,} rows)",
+            value=preview["sample"],
+            key="preview_sample",
+            on_change=_toggle_preview_sample,
+            args=(engine,),
+        )
+    if preview["error"]:
+        st.error(f"Error previewing data: {preview['error']}")
+
+    st.dataframe(preview["df"])
+    if preview["sample"]:
+        st.button("🎲 New Sample", on_click=_resample_preview, args=(engine,))
+    else:
+        page = len(preview["cursors"])
+        st.caption(f"Page {page} · ordered by {', '.join(preview['key_columns']) or 'ctid'}")
+        prev_col, next_col = st.columns(2)
+        prev_col.button("◀ Previous", on_click=_previous_preview_page, args=(engine,), disabled=page == 1)
+        next_col.button("Next ▶", on_click=_next_preview_page, args=(engine,), disabled=preview["next_after"] is None)
@@ -0,0 +1,74 @@
+import time
+import threading
+
+from sqlalchemy import create_engine, text
+
+from governor import Governor, TokenBucket, background_context, bind_session, _on_wait, _session_id
+
+
+def test_token_bucket_waits_for_refill():
+    bucket = TokenBucket(per_minute=60)
+    assert bucket.wait_time(60) == 0
+    bucket.take(60)
+    assert 0.9 < bucket.wait_time(1) <= 1.0
+
+
+def test_queued_calls_are_admitted_round_robin_across_sessions():
+    governor = Governor(db_max_concurrent=1)
+    engine = create_engine("sqlite://")
+    admitted = []
+    positions = []
+    release = threading.Event()
+
+    def run(session_id, label):
+        bind_session(session_id, on_wait=positions.append)
+        with governor.db_connection(engine) as connection:
+            connection.execute(text("SELECT 1"))
+            admitted.append(label)
+            if label == "hold":
+                release.wait()
+
+    holder = threading.Thread(target=run, args=("busy", "hold"))
+    holder.start()
+    while not admitted:
+        time.sleep(0.01)
+
+    # The busy session queues three statements before the quiet one queues its first
+    threads = []
+    for session_id, label in [("busy", "busy-1"), ("busy", "busy-2"), ("busy", "busy-3"), ("quiet", "quiet-1")]:
+        thread = threading.Thread(target=run, args=(session_id, label))
+        thread.start()
+        threads.append(thread)
+        time.sleep(0.05)
+
+    assert governor.snapshot()["queued"]["db"] == 4
+    release.set()
+    for thread in [holder, *threads]:
+        thread.join(timeout=5)
+
+    assert admitted == ["hold", "busy-1", "quiet-1", "busy-2", "busy-3"]
+    assert None in positions
+
+
+def test_llm_slot_blocks_when_requests_per_minute_are_spent():
+    governor = Governor(model_limits={"fake": (60, 100_000)})
+    for _ in range(60):
+        with governor.llm_slot("fake", tokens=10):
+            pass
+
+    start = time.perf_counter()
+    with governor.llm_slot("fake", tokens=10):
+        pass
+    assert time.perf_counter() - start > 0.5
+
+
+def test_background_context_keeps_the_session_but_not_the_ui_callback():
+    def run():
+        bind_session("alice", on_wait=print)
+        return background_context().run(lambda: (_session_id.get(), _on_wait.get()))
+
+    result = []
+    thread = threading.Thread(target=lambda: result.append(run()))
+    thread.start()
+    thread.join()
+    assert result == [("alice", None)]
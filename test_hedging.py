@@ -0,0 +1,160 @@
+import time
+import asyncio
+
+from langchain_core.language_models import FakeListChatModel
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import PromptTemplate
+from langchain_core.runnables import RunnableLambda
+
+from governor import Governor
+from hedging import HedgedRunnable
+
+
+def slow_first_call(delay):
+    calls = []
+
+    def respond(text):
+        calls.append(text)
+        if len(calls) == 1:
+            time.sleep(delay)
+            return "slow"
+        return "fast"
+
+    return RunnableLambda(respond), calls
+
+
+def test_fast_requests_are_not_hedged():
+    hedged = HedgedRunnable(RunnableLambda(lambda text: text.upper()), name="fast", budget=1.0, initial_deadline=1.0)
+
+    assert hedged.invoke("hi") == "HI"
+    stats = hedged.stats()
+    assert (stats["requests"], stats["hedges"]) == (1, 0)
+
+
+def test_slow_request_is_hedged_and_backup_wins():
+    runnable, calls = slow_first_call(delay=1.0)
+    hedged = HedgedRunnable(runnable, name="slow", budget=1.0, initial_deadline=0.05)
+
+    start = time.perf_counter()
+    assert hedged.invoke("hi") == "fast"
+    assert time.perf_counter() - start < 0.5
+    stats = hedged.stats()
+    assert (len(calls), stats["hedges"], stats["hedge_wins"]) == (2, 1, 1)
+
+
+def test_savings_use_the_losing_primary_latency():
+    calls = []
+
+    def respond(text):
+        calls.append(text)
+        # Primaries are the odd calls, backups the even ones
+        time.sleep(0.8 if len(calls) % 2 else 0.05)
+        return text
+
+    hedged = HedgedRunnable(RunnableLambda(respond), name="saved", budget=1.0, initial_deadline=0.1)
+    for _ in range(10):
+        hedged.invoke("hi")
+    time.sleep(0.9)
+
+    stats = hedged.stats()
+    assert stats["hedge_wins"] == 10
+    assert stats["p99_s"] < 0.6
+    assert stats["p99_saved_s"] > 0.2
+
+
+def test_backup_waits_for_a_governor_slot_and_is_dropped_when_the_primary_wins():
+    governor = Governor(model_limits={"fake": (60, 100_000)})
+    for _ in range(60):
+        with governor.llm_slot("fake", tokens=10):
+            pass
+
+    runnable, calls = slow_first_call(delay=0.3)
+    hedged = HedgedRunnable(
+        runnable, name="governed", budget=1.0, initial_deadline=0.05,
+        backup_slot=lambda input: governor.llm_slot("fake", tokens=10),
+    )
+    assert hedged.invoke("hi") == "slow"
+    assert governor.snapshot()["queued"]["llm:fake"] == 1
+
+    # Once admitted the duplicate sees the primary already won and is never sent,
+    # so it is not counted as a hedge and its request is handed back
+    time.sleep(1.0)
+    assert governor.snapshot()["queued"]["llm:fake"] == 0
+    assert len(calls) == 1
+    assert hedged.stats()["hedges"] == 0
+    requests, _ = governor._model_buckets("fake")
+    assert requests.wait_time(1) == 0
+
+
+def test_async_backup_cancelled_while_queued_releases_its_slot():
+    governor = Governor(model_limits={"fake": (60, 100_000)})
+    for _ in range(60):
+        with governor.llm_slot("fake", tokens=10):
+            pass
+
+    calls = []
+
+    async def respond(text):
+        calls.append(text)
+        await asyncio.sleep(0.3)
+        return "slow"
+
+    hedged = HedgedRunnable(
+        RunnableLambda(lambda text: text, afunc=respond), name="async-governed", budget=1.0, initial_deadline=0.05,
+        backup_slot=lambda input: governor.llm_slot("fake", tokens=10),
+    )
+
+    async def run():
+        result = await hedged.ainvoke("hi")
+        queued = governor.snapshot()["queued"]["llm:fake"]
+        # Let the worker thread get the slot and the release callback run
+        await asyncio.sleep(1.0)
+        return result, queued
+
+    assert asyncio.run(run()) == ("slow", 1)
+    assert governor.snapshot()["queued"]["llm:fake"] == 0
+    assert len(calls) == 1
+    assert hedged.stats()["hedges"] == 0
+    requests, _ = governor._model_buckets("fake")
+    assert requests.wait_time(1) == 0
+
+
+def test_budget_caps_duplicate_requests():
+    runnable, calls = slow_first_call(delay=0.2)
+    hedged = HedgedRunnable(runnable, name="capped", budget=0.0, initial_deadline=0.01)
+
+    assert hedged.invoke("hi") == "slow"
+    assert (len(calls), hedged.stats()["hedges"]) == (1, 0)
+
+
+def test_async_loser_is_cancelled():
+    cancelled = []
+
+    async def respond(text):
+        if not cancelled:
+            cancelled.append(False)
+            try:
+                await asyncio.sleep(1.0)
+            except asyncio.CancelledError:
+                cancelled[0] = True
+                raise
+            return "slow"
+        return "fast"
+
+    hedged = HedgedRunnable(RunnableLambda(lambda text: text, afunc=respond), name="async", budget=1.0, initial_deadline=0.05)
+
+    async def run():
+        result = await hedged.ainvoke("hi")
+        await asyncio.sleep(0)
+        return result
+
+    assert asyncio.run(run()) == "fast"
+    assert cancelled == [True]
+
+
+def test_chain_interface_is_unchanged():
+    prompt = PromptTemplate.from_template("Say {word}")
+    chain = prompt | HedgedRunnable(FakeListChatModel(responses=["hello"]), budget=1.0) | StrOutputParser()
+
+    assert chain.invoke({"word": "hello"}) == "hello"
+    assert chain.batch([{"word": "a"}, {"word": "b"}]) == ["hello", "hello"]
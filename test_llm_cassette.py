@@ -0,0 +1,70 @@
+import json
+import time
+
+import pytest
+from langchain_core.language_models import FakeListChatModel
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import PromptTemplate
+
+import llm_cassette
+from llm_cassette import CassetteChatModel, CassetteMiss, synthetic_entries
+
+prompt = PromptTemplate.from_template("Classify: {question}")
+
+
+def chain(tmp_path, mode, inner=None, latency=0.0):
+    llm = CassetteChatModel(
+        model_name="gpt-4o-mini",
+        cassette_path=str(tmp_path / "cassette.json"),
+        mode=mode,
+        inner=inner,
+        latency=latency,
+    )
+    return prompt | llm | StrOutputParser()
+
+
+def test_recorded_response_is_replayed_without_the_real_model(tmp_path):
+    recorder = chain(tmp_path, "record", inner=FakeListChatModel(responses=['{"type": "general"}']))
+    assert recorder.invoke({"question": "What is the capital of France?"}) == '{"type": "general"}'
+
+    replayer = chain(tmp_path, "replay")
+    assert replayer.invoke({"question": "What is the capital of France?"}) == '{"type": "general"}'
+    assert (tmp_path / "cassette.json").exists()
+
+
+def test_recording_keeps_the_other_fixtures_in_the_file(tmp_path):
+    chain(tmp_path, "record", inner=FakeListChatModel(responses=["general"])).invoke({"question": "Hi"})
+    # A new process starts without the file loaded
+    llm_cassette._cassettes.clear()
+
+    chain(tmp_path, "record", inner=FakeListChatModel(responses=["database"])).invoke({"question": "How many rows?"})
+    assert len(json.loads((tmp_path / "cassette.json").read_text())) == 2
+    assert chain(tmp_path, "replay").invoke({"question": "Hi"}) == "general"
+
+
+def test_recording_replaces_synthetic_entries(tmp_path):
+    chain(tmp_path, "record", inner=FakeListChatModel(responses=["general"])).invoke({"question": "Hi"})
+    cassette = json.loads((tmp_path / "cassette.json").read_text())
+    for entry in cassette.values():
+        entry["synthetic"] = True
+    (tmp_path / "cassette.json").write_text(json.dumps(cassette))
+    llm_cassette._cassettes.clear()
+    assert synthetic_entries(tmp_path / "cassette.json") == 1
+
+    chain(tmp_path, "record", inner=FakeListChatModel(responses=["general"])).invoke({"question": "Hi"})
+    assert synthetic_entries(tmp_path / "cassette.json") == 0
+
+
+def test_changed_prompt_fails_loudly(tmp_path):
+    chain(tmp_path, "record", inner=FakeListChatModel(responses=["general"])).invoke({"question": "Hi"})
+
+    with pytest.raises(CassetteMiss, match="Re-record"):
+        chain(tmp_path, "replay").invoke({"question": "Hi there"})
+
+
+def test_replay_can_simulate_latency(tmp_path):
+    chain(tmp_path, "record", inner=FakeListChatModel(responses=["general"])).invoke({"question": "Hi"})
+
+    start = time.perf_counter()
+    chain(tmp_path, "replay", latency=0.2).invoke({"question": "Hi"})
+    assert time.perf_counter() - start >= 0.2
@@ -0,0 +1,46 @@
+import pytest
+from langchain_core.language_models import FakeListChatModel
+from langchain_core.output_parsers import JsonOutputParser
+from langchain_core.prompts import PromptTemplate
+
+from model_router import ModelRouter, require_choice
+
+prompt = PromptTemplate.from_template("Classify: {question}")
+parser = JsonOutputParser()
+
+
+def make_router(responses):
+    return ModelRouter(
+        routes={"classification": ["cheap", "strong"]},
+        model_factory=lambda name: FakeListChatModel(responses=responses[name]),
+    )
+
+
+def test_cheapest_model_answers_when_output_is_valid():
+    router = make_router({"cheap": ['{"type": "general"}'], "strong": ['{"type": "database"}']})
+    chain = router.chain("classification", lambda llm: prompt | llm | parser, require_choice("type", {"general", "database"}))
+
+    assert chain.invoke({"question": "What is the capital of France?"}) == {"type": "general"}
+    assert [(s["model"], s["calls"], s["escalation_rate"]) for s in router.stats()] == [("cheap", 1, 0.0)]
+
+
+@pytest.mark.parametrize("cheap_response", ["not json at all", '{"type": "weather"}'])
+def test_parse_or_validation_failure_escalates(cheap_response):
+    router = make_router({"cheap": [cheap_response], "strong": ['{"type": "database"}']})
+    chain = router.chain("classification", lambda llm: prompt | llm | parser, require_choice("type", {"general", "database"}))
+
+    assert chain.invoke({"question": "How many rows are in users?"}) == {"type": "database"}
+    stats = {s["model"]: s for s in router.stats()}
+    assert stats["cheap"]["escalation_rate"] == 1.0
+    assert stats["strong"]["failures"] == 0
+
+
+def test_last_tier_failure_is_raised():
+    router = make_router({"cheap": ["nope"], "strong": ["still nope"]})
+    chain = router.chain("classification", lambda llm: prompt | llm | parser)
+
+    with pytest.raises(ValueError):
+        chain.invoke({"question": "?"})
+    stats = {s["model"]: s for s in router.stats()}
+    assert stats["strong"]["failures"] == 1
+    assert stats["strong"]["escalation_rate"] == 0.0
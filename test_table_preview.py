@@ -0,0 +1,30 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+
+from table_preview import fetch_preview_page, sample_percent
+
+
+def test_keyset_pages_cover_the_table_once_in_key_order():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE ads (account INTEGER, id INTEGER, clicks INTEGER, PRIMARY KEY (account, id))"))
+        connection.execute(
+            text("INSERT INTO ads VALUES (:account, :id, :clicks)"),
+            [{"account": account, "id": id, "clicks": account * 10 + id} for account in (2, 1) for id in range(5, 0, -1)],
+        )
+
+    seen = []
+    after = None
+    while True:
+        df, after = fetch_preview_page(engine, "main", "ads", ["account", "id"], after, page_size=4)
+        seen += list(df[["account", "id"]].itertuples(index=False, name=None))
+        if after is None:
+            break
+
+    assert seen == [(account, id) for account in (1, 2) for id in range(1, 6)]
+
+
+def test_sample_size_does_not_grow_with_the_table():
+    for estimated_rows in (2_000_000, 500_000_000, 10**12):
+        assert sample_percent(estimated_rows, page_size=50) / 100 * estimated_rows == pytest.approx(500)